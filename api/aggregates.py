@@ -0,0 +1,85 @@
+from . import db
+from .models import Book
+from .pagination import BOOK_FIELDS
+from .search import fts_available, fts_match_expression, title_matches
+
+
+def book_filters(categorias=(), ratings=(), min_price=None, max_price=None, title=''):
+    """
+    Condições SQL da seleção de livros: categorias e ratings (listas de valores exatos),
+    faixa de preço e palavras do título (FTS5, com LIKE se o índice não existir).
+    """
+    conditions = []
+    if categorias:
+        conditions.append(Book.categoria.in_(categorias))
+    if ratings:
+        conditions.append(Book.rating.in_(ratings))
+    if min_price is not None:
+        conditions.append(Book.preco >= min_price)
+    if max_price is not None:
+        conditions.append(Book.preco <= max_price)
+    if title:
+        expression = fts_match_expression(title)
+        if expression and fts_available():
+            matches = title_matches(expression)
+            conditions.append(Book.id.in_(db.select(matches.c.rowid)))
+        else:
+            conditions.append(Book.titulo.ilike(f'%{title}%'))
+    return conditions
+
+
+def summary(conditions):
+    """Total de livros, preço médio e quantidade de categorias da seleção."""
+    total, preco_medio, categorias = db.session.execute(
+        db.select(db.func.count(), db.func.avg(Book.preco), db.func.count(Book.categoria.distinct()))
+        .where(*conditions)
+    ).one()
+    return {'total': total, 'preco_medio': preco_medio or 0.0, 'categorias': categorias}
+
+
+def price_bucket(menor, largura, bins):
+    """Expressão SQL da faixa de preço (0 a bins - 1) de cada livro, com faixas de `largura` a partir de `menor`."""
+    return db.func.min(db.cast((Book.preco - menor) / largura, db.Integer), bins - 1)
+
+
+def price_histogram(conditions, bins=50):
+    """
+    Histograma de preços da seleção, agregado no banco: lista de (início, fim, quantidade)
+    para `bins` faixas de mesma largura entre o menor e o maior preço da seleção.
+    """
+    menor, maior = db.session.execute(
+        db.select(db.func.min(Book.preco), db.func.max(Book.preco)).where(*conditions)
+    ).one()
+    if menor is None:
+        return []
+    largura = (maior - menor) / bins or 1.0
+    faixa = price_bucket(menor, largura, bins)
+    contagens = dict(db.session.execute(
+        db.select(faixa, db.func.count()).where(*conditions).group_by(faixa)
+    ).all())
+    return [
+        (menor + i * largura, menor + (i + 1) * largura, contagens.get(i, 0))
+        for i in range(bins)
+    ]
+
+
+def category_counts(conditions, limit=None):
+    """Quantidade de livros por categoria na seleção, da maior para a menor."""
+    quantidade = db.func.count().label('quantidade')
+    query = (
+        db.select(Book.categoria, quantidade).where(*conditions)
+        .group_by(Book.categoria).order_by(quantidade.desc(), Book.categoria)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return db.session.execute(query).all()
+
+
+def book_page(conditions, page, page_size):
+    """Página `page` (a partir de 1) dos livros da seleção, em ordem de id, como dicionários."""
+    columns = [getattr(Book, field) for field in BOOK_FIELDS]
+    rows = db.session.execute(
+        db.select(*columns).where(*conditions).order_by(Book.id)
+        .limit(page_size).offset((page - 1) * page_size)
+    ).all()
+    return [dict(zip(BOOK_FIELDS, row)) for row in rows]
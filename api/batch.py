@@ -0,0 +1,70 @@
+from flask import current_app, request, abort
+from .models import Book
+
+# Maior inteiro aceito pelo SQLite (INTEGER com sinal de 64 bits); ids maiores estouram no bind.
+MAX_BOOK_ID = 2 ** 63 - 1
+
+
+def _invalid_ids():
+    abort(400, description="Informe 'ids' como uma lista de números inteiros positivos "
+                           "(JSON {\"ids\": [1, 2, 3]} no POST ou ?ids=1,2,3 no GET).")
+
+
+def parse_batch_ids():
+    """
+    Lê os ids pedidos: do corpo JSON ({"ids": [...]}) no POST ou de ?ids=1,2,3 no GET.
+    Mantém a ordem e as repetições; recusa listas vazias ou maiores que BOOKS_BATCH_MAX_IDS
+    e ids fora do intervalo de um INTEGER do SQLite (1 a MAX_BOOK_ID).
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        ids = body.get('ids') if isinstance(body, dict) else None
+        if not isinstance(ids, list) or any(isinstance(value, bool) or not isinstance(value, int) for value in ids):
+            _invalid_ids()
+    else:
+        raw = [value.strip() for value in request.args.get('ids', '').split(',') if value.strip()]
+        try:
+            ids = [int(value) for value in raw]
+        except ValueError:
+            _invalid_ids()
+    if not ids or any(not 1 <= value <= MAX_BOOK_ID for value in ids):
+        _invalid_ids()
+    max_ids = current_app.config['BOOKS_BATCH_MAX_IDS']
+    if len(ids) > max_ids:
+        abort(400, description=f"No máximo {max_ids} ids por requisição (recebidos {len(ids)}).")
+    return ids
+
+
+def fetch_rows_by_id(ids, columns):
+    """
+    Busca as colunas pedidas dos livros com os ids informados, com uma consulta IN por
+    bloco de BOOKS_BATCH_CHUNK_SIZE ids (limite de parâmetros do SQLite).
+    Retorna {id: tupla de colunas} apenas com os ids encontrados.
+    """
+    chunk_size = current_app.config['BOOKS_BATCH_CHUNK_SIZE']
+    unique_ids = list(dict.fromkeys(ids))
+    id_index = columns.index('id')
+    entities = [getattr(Book, column) for column in columns]
+    found = {}
+    for start in range(0, len(unique_ids), chunk_size):
+        chunk = unique_ids[start:start + chunk_size]
+        for row in Book.query.with_entities(*entities).filter(Book.id.in_(chunk)):
+            found[row[id_index]] = tuple(row)
+    return found
+
+
+def batch_payload(ids, found, fields):
+    """
+    Corpo da resposta em lote: 'livros' segue a ordem dos ids pedidos, com null nas
+    posições dos ids inexistentes, que também são listados em 'nao_encontrados'.
+    """
+    livros = []
+    nao_encontrados = []
+    for book_id in ids:
+        row = found.get(book_id)
+        if row is None:
+            livros.append(None)
+            nao_encontrados.append(book_id)
+        else:
+            livros.append(dict(zip(fields, row)))
+    return {'livros': livros, 'nao_encontrados': nao_encontrados}
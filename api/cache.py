@@ -0,0 +1,189 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import request, current_app, g
+from werkzeug.http import is_resource_modified
+from sqlalchemy.exc import OperationalError
+from . import db
+
+
+class ResponseCache:
+    """
+    Cache LRU com TTL das respostas da API, em memória do processo.
+    Cada entrada guarda a versão do dataset com que foi gerada; quando a versão
+    muda o cache inteiro é descartado.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        with self.lock:
+            self._check_version(version)
+            entry = self.entries.get(key)
+            if entry is None or entry['expira_em'] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, status, mimetype, headers, body):
+        with self.lock:
+            self._check_version(version)
+            self.entries[key] = {
+                'status': status,
+                'mimetype': mimetype,
+                'headers': headers,
+                'body': body,
+                'expira_em': time.monotonic() + self.ttl,
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'dataset_version': self.version,
+            }
+
+
+class VersionTracker:
+    """
+    Lê a versão do dataset (tabela dataset_version, trocada a cada carga que altera
+    livros). A leitura é reaproveitada por check_interval segundos para não custar
+    uma consulta por requisição.
+    """
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self.value = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.checked_at is None or now - self.checked_at >= self.check_interval:
+                self.value = _read_dataset_version()
+                self.checked_at = now
+            return self.value
+
+
+def _read_dataset_version():
+    from .models import DatasetVersion
+
+    try:
+        row = db.session.get(DatasetVersion, 1)
+    except OperationalError:
+        # Banco criado antes da tabela dataset_version: sem versão, sem cache.
+        db.session.rollback()
+        return None
+    if row is None:
+        return None
+    return row.versao, row.atualizado_em
+
+
+def _cache_key():
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+def _etag(versao):
+    digest = hashlib.sha1(f'{versao}:{_cache_key()!r}'.encode()).hexdigest()
+    return digest[:32]
+
+
+def _set_validators(response, versao, atualizado_em):
+    response.set_etag(_etag(versao))
+    response.last_modified = atualizado_em
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['HTTP_CACHE_MAX_AGE']
+    response.cache_control.must_revalidate = True
+    return response
+
+
+# Cabeçalhos que não são guardados no cache (recalculados a cada resposta).
+_UNCACHED_HEADERS = {'content-type', 'content-length', 'etag', 'last-modified', 'cache-control', 'x-cache'}
+
+
+def _is_cacheable_request():
+    return (
+        request.method == 'GET'
+        and request.blueprint == 'api'
+        and request.endpoint not in current_app.config['HTTP_CACHE_EXCLUDED_ENDPOINTS']
+    )
+
+
+def init_app(app):
+    """
+    Registra o leitor da versão do dataset (app.extensions['dataset_version']) e, se
+    HTTP_CACHE_ENABLED, o cache HTTP (ETag / 304) e o cache de respostas em memória.
+    """
+    version = VersionTracker(app.config['DATASET_VERSION_CHECK_INTERVAL'])
+    app.extensions['dataset_version'] = version
+    if not app.config['HTTP_CACHE_ENABLED']:
+        return
+    cache = ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+    app.extensions['response_cache'] = cache
+
+    @app.before_request
+    def serve_from_cache():
+        if not _is_cacheable_request():
+            return None
+        current = version.get()
+        g.dataset_version = current
+        if current is None:
+            return None
+        versao, atualizado_em = current
+        if not is_resource_modified(request.environ, etag=_etag(versao), last_modified=atualizado_em):
+            response = current_app.response_class(status=304)
+            return _set_validators(response, versao, atualizado_em)
+        entry = cache.get(_cache_key(), versao)
+        if entry is not None:
+            response = current_app.response_class(
+                entry['body'], status=entry['status'], mimetype=entry['mimetype'], headers=entry['headers']
+            )
+            response.headers['X-Cache'] = 'HIT'
+            return _set_validators(response, versao, atualizado_em)
+        return None
+
+    @app.after_request
+    def store_in_cache(response):
+        if response.status_code != 200 or not _is_cacheable_request() or 'X-Cache' in response.headers:
+            return response
+        current = g.get('dataset_version')
+        if current is None:
+            return response
+        versao, atualizado_em = current
+        if not response.is_streamed:
+            headers = [(k, v) for k, v in response.headers if k.lower() not in _UNCACHED_HEADERS]
+            cache.put(_cache_key(), versao, response.status_code, response.mimetype, headers, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+        return _set_validators(response, versao, atualizado_em)
+
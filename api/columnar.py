@@ -0,0 +1,53 @@
+import string
+import threading
+from flask import current_app
+from .pagination import list_args, rows_response, selected_columns
+
+BACKENDS = ('sql', 'columnar')
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _nocase(value):
+    """Chave equivalente à collation NOCASE do SQLite (só letras ASCII são igualadas)."""
+    return value.translate(_ASCII_LOWER)
+
+
+def init_app(app):
+    """Valida BOOKS_BACKEND. Os arrays são carregados na primeira requisição."""
+    backend = app.config['BOOKS_BACKEND']
+    if backend not in BACKENDS:
+        raise ValueError(f"BOOKS_BACKEND inválido: {backend!r} (use {' ou '.join(BACKENDS)}).")
+    app.extensions['columnar_lock'] = threading.Lock()
+
+
+def columnar_store():
+    """
+    Retorna o ColumnarStore do app quando BOOKS_BACKEND = 'columnar' (ou None no
+    backend SQL). Os arrays são recarregados quando a versão do dataset muda.
+    """
+    if current_app.config['BOOKS_BACKEND'] != 'columnar':
+        return None
+    version = current_app.extensions['dataset_version'].get()
+    store = current_app.extensions.get('columnar_store')
+    if store is None or store.version != version:
+        with current_app.extensions['columnar_lock']:
+            store = current_app.extensions.get('columnar_store')
+            if store is None or store.version != version:
+                # Importado só aqui: no backend SQL o processo não carrega o NumPy.
+                from .columnar_arrays import ColumnarStore
+
+                store = ColumnarStore.load(version)
+                current_app.extensions['columnar_store'] = store
+    return store
+
+
+def columnar_list_response(store, positions, order_by_id=True):
+    """Equivalente a pagination.book_list_response para uma seleção do ColumnarStore."""
+    args = list_args(order_by_id=order_by_id)
+    if args['after_id'] is not None:
+        positions = positions[store.ids[positions] > args['after_id']]
+    if args['limit'] is not None:
+        positions = positions[:args['limit']]
+    rows = store.rows(positions, selected_columns(args['fields']))
+    return rows_response(rows, args, order_by_id=order_by_id)
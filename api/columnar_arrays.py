@@ -0,0 +1,202 @@
+import re
+import math
+import numpy as np
+from . import db
+from .models import Book
+from .pagination import BOOK_FIELDS, STREAM_CHUNK_SIZE
+from .stats import SNAPSHOT_OVERVIEW, SNAPSHOT_CATEGORIES, _dumps
+from .columnar import _nocase
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def _like_regex(pattern):
+    """Expressão regular equivalente a lower(x) LIKE lower(pattern) no SQLite (ILIKE)."""
+    parts = []
+    for char in _nocase(pattern):
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+def _object_array(values):
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _group_bounds(sorted_codes, groups):
+    """Limites [inicio, fim) de cada código em um vetor de códigos já ordenado."""
+    return np.searchsorted(sorted_codes, np.arange(groups + 1))
+
+
+class ColumnarStore:
+    """
+    Cópia em memória da tabela book em arrays NumPy, uma coluna por campo, com as
+    linhas em ordem de id. As consultas das rotas viram operações sobre posições
+    (índices nesses arrays):
+
+    - faixa de preço: busca binária (searchsorted) no array de preços ordenado;
+    - categoria e rating: índices de grupo pré-calculados, já em ordem de id;
+    - estatísticas: reduções vetorizadas por categoria, calculadas na carga.
+
+    Os valores devolvidos nas respostas são os objetos Python lidos do banco, para que
+    o JSON seja idêntico ao do backend SQL.
+    """
+
+    def __init__(self, columns, version=None):
+        self.version = version
+        self.size = len(columns['id'])
+        self.ids = np.asarray(columns['id'], dtype=np.int64)
+        self.values = {field: _object_array(columns[field]) for field in BOOK_FIELDS}
+
+        self.preco = np.asarray(columns['preco'], dtype=np.float64)
+        self.by_price = np.argsort(self.preco, kind='stable')
+        self.sorted_prices = self.preco[self.by_price]
+
+        self.rating_numerico = np.array(
+            [-1 if value is None else value for value in columns['rating_numerico']], dtype=np.int64
+        )
+        self.by_rating = {rating: np.flatnonzero(self.rating_numerico == rating) for rating in range(1, 6)}
+
+        categories, codes = np.unique(self.values['categoria'], return_inverse=True)
+        self.categories = categories.tolist()
+        self.category_codes = codes
+        self.by_category_code = np.argsort(codes, kind='stable')
+        bounds = _group_bounds(codes[self.by_category_code], len(self.categories))
+        self.by_category = {}
+        for code, name in enumerate(self.categories):
+            self.by_category.setdefault(_nocase(name), []).append(self.by_category_code[bounds[code]:bounds[code + 1]])
+        self.by_category = {
+            key: groups[0] if len(groups) == 1 else np.sort(np.concatenate(groups))
+            for key, groups in self.by_category.items()
+        }
+
+        overview, categories_stats = self._compute_stats()
+        self.stats = {SNAPSHOT_OVERVIEW: _dumps(overview), SNAPSHOT_CATEGORIES: _dumps(categories_stats)}
+
+    @classmethod
+    def load(cls, version=None):
+        """Lê a tabela book inteira (em ordem de id) para os arrays."""
+        columns = {field: [] for field in BOOK_FIELDS}
+        query = db.select(*(getattr(Book, field) for field in BOOK_FIELDS)).order_by(Book.id)
+        for row in db.session.execute(query).yield_per(STREAM_CHUNK_SIZE):
+            for field, value in zip(BOOK_FIELDS, row):
+                columns[field].append(value)
+        return cls(columns, version)
+
+    def _compute_stats(self):
+        """Mesmo resultado de stats.compute_stats, calculado por categoria sobre os arrays."""
+        ratings = self.values['rating']
+        rated = np.array([value is not None for value in ratings], dtype=bool)
+        rating_names, rating_codes = np.unique(ratings[rated], return_inverse=True)
+        rating_names = rating_names.tolist()
+
+        total = self.size
+        overview = {
+            'total_de_livros': total,
+            'preco_medio': round(math.fsum(self.preco) / total, 2) if total > 0 else 0,
+            'distribuicao_de_ratings': dict(zip(rating_names, np.bincount(rating_codes).tolist())),
+            'total_de_categorias': len(self.categories),
+        }
+        if total:
+            summary = self._price_summary(self.sorted_prices, np.array([0, total]))
+            overview.update({key: values[0] for key, values in summary.items()})
+
+        groups = len(self.categories)
+        order = np.lexsort((self.preco, self.category_codes))
+        precos = self.preco[order]
+        bounds = _group_bounds(self.category_codes[order], groups)
+        summaries = self._price_summary(precos, bounds)
+        counts = np.bincount(
+            self.category_codes[rated] * len(rating_names) + rating_codes,
+            minlength=groups * len(rating_names),
+        ).reshape(groups, len(rating_names)).tolist()
+
+        categories = {}
+        for code, name in enumerate(self.categories):
+            precos_categoria = precos[bounds[code]:bounds[code + 1]]
+            categories[name] = {
+                'quantidade_de_livros': len(precos_categoria),
+                # fsum (soma exata) para arredondar igual ao snapshot calculado em Python.
+                'preco_medio': f'{round(math.fsum(precos_categoria) / len(precos_categoria), 2)}',
+                'distribuicao_de_ratings': {
+                    rating: count for rating, count in zip(rating_names, counts[code]) if count
+                },
+                **{key: values[code] for key, values in summaries.items()},
+            }
+        return overview, categories
+
+    @staticmethod
+    def _price_summary(precos, bounds):
+        """Mínimo, máximo e mediana de cada grupo [bounds[i], bounds[i + 1]) de preços ordenados."""
+        starts, ends = bounds[:-1], bounds[1:]
+        sizes = ends - starts
+        middle = starts + sizes // 2
+        even = sizes % 2 == 0
+        medians = np.where(even, (precos[np.maximum(middle - 1, starts)] + precos[middle]) / 2, precos[middle])
+        return {
+            'preco_minimo': precos[starts].tolist(),
+            'preco_maximo': precos[ends - 1].tolist(),
+            'preco_mediano': [round(value, 2) for value in medians.tolist()],
+        }
+
+    # --- Seleções: arrays de posições, em ordem de id salvo indicação contrária ---
+
+    def all(self):
+        return np.arange(self.size)
+
+    def position(self, book_id):
+        index = int(np.searchsorted(self.ids, book_id))
+        if index < self.size and self.ids[index] == book_id:
+            return index
+        return None
+
+    def positions_of(self, book_ids):
+        """Posições dos ids informados, na mesma ordem, ignorando ids inexistentes."""
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        if not self.size or not len(book_ids):
+            return _EMPTY
+        index = np.minimum(np.searchsorted(self.ids, book_ids), self.size - 1)
+        return index[self.ids[index] == book_ids]
+
+    def price_range(self, min_price, max_price):
+        if math.isnan(min_price) or math.isnan(max_price):
+            return _EMPTY
+        start = np.searchsorted(self.sorted_prices, min_price, side='left')
+        end = np.searchsorted(self.sorted_prices, max_price, side='right')
+        return np.sort(self.by_price[start:end])
+
+    def top_rated(self, min_rating, order='id'):
+        positions = np.flatnonzero(self.rating_numerico >= min_rating)
+        if order == 'rating':
+            return np.concatenate([self.by_rating[rating] for rating in range(5, min_rating - 1, -1)])
+        if order == 'preco':
+            return positions[np.argsort(self.preco[positions], kind='stable')]
+        return positions
+
+    def category(self, name):
+        return self.by_category.get(_nocase(name), _EMPTY)
+
+    def title_like(self, text):
+        """Equivalente a Book.titulo.ilike('%texto%')."""
+        pattern = _like_regex(f'%{text}%')
+        titles = self.values['titulo']
+        return np.flatnonzero([pattern.fullmatch(_nocase(title)) is not None for title in titles])
+
+    def rows(self, positions, columns):
+        """Tuplas com as colunas pedidas das linhas nas posições informadas."""
+        return zip(*(self.values[column][positions].tolist() for column in columns))
+
+    def rows_by_id(self, book_ids, columns):
+        """{id: tupla de colunas} dos ids informados que existem (equivalente a batch.fetch_rows_by_id)."""
+        positions = self.positions_of(list(dict.fromkeys(book_ids)))
+        id_index = columns.index('id')
+        return {row[id_index]: row for row in self.rows(positions, columns)}
+
+    def book(self, position):
+        return {field: self.values[field][position] for field in BOOK_FIELDS}
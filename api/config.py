@@ -6,5 +6,90 @@ data_dir = os.path.join(project_root, 'data')
 
 os.makedirs(data_dir, exist_ok=True)
 
-SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(data_dir, 'books.db')
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join(data_dir, 'books.db'))
+# O servidor de produção (gunicorn.conf.py) abre o banco somente para leitura; a carga
+# (scripts/database_setup.py) continua abrindo para escrita.
+DATABASE_READ_ONLY = os.environ.get('DATABASE_READ_ONLY', '0') == '1'
+if DATABASE_READ_ONLY:
+    SQLALCHEMY_DATABASE_URI = f'sqlite:///file:{DATABASE_PATH}?mode=ro&uri=true'
+else:
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + DATABASE_PATH
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Threads por worker do gunicorn. O pool de conexões de cada processo tem o mesmo
+# tamanho (uma conexão por thread atendendo requisições).
+WEB_THREADS = int(os.environ.get('WEB_THREADS', '4'))
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'pool_size': WEB_THREADS,
+    'max_overflow': WEB_THREADS,
+    'pool_timeout': 10,
+    # As conexões do pool são usadas por threads diferentes (uma de cada vez).
+    'connect_args': {'check_same_thread': False, 'timeout': 15},
+}
+# PRAGMAs aplicados a cada nova conexão SQLite: leitura por mmap (bytes) e cache de
+# páginas (valor negativo = KiB) por conexão.
+SQLITE_PRAGMAS = {
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', str(-64 * 1024))),
+}
+
+# Documentação Swagger (/apidocs): 'lazy' monta o Flasgger no primeiro acesso (a API e os
+# workers iniciam sem importá-lo), 'eager' registra na criação do app, 'off' desliga.
+API_DOCS = os.environ.get('API_DOCS', 'lazy')
+
+# Maior valor aceito no parâmetro 'limit' das listagens de livros.
+BOOKS_MAX_PAGE_SIZE = 1000
+# Serializador JSON: 'auto' (orjson, se instalado), 'orjson' ou 'stdlib'.
+JSON_SERIALIZER = os.environ.get('JSON_SERIALIZER', 'auto')
+# Quantidade de respostas de /books/<id> mantidas já codificadas em memória.
+BOOK_JSON_CACHE_SIZE = 10000
+# Busca em lote (/books/batch): máximo de ids por requisição e ids por consulta IN.
+BOOKS_BATCH_MAX_IDS = 1000
+BOOKS_BATCH_CHUNK_SIZE = 500
+
+# Busca facetada (/books/facets): livros por página (padrão) e faixas de preço da
+# faceta de preço (padrão e máximo aceito no parâmetro 'buckets').
+FACETS_PAGE_SIZE = 20
+FACETS_PRICE_BUCKETS = 10
+FACETS_MAX_PRICE_BUCKETS = 100
+# Agregações (categoria x rating x faixa de preço) mantidas em cache por combinação de
+# título, faixas e filtro de preço, até a versão do dataset mudar.
+FACETS_CACHE_SIZE = 256
+
+# Exportação (/export): snapshot Parquet gravado ao final de cada carga (None = arquivo
+# .parquet ao lado do banco), linhas por lote enviado e linhas por row group do snapshot.
+EXPORT_SNAPSHOT_PATH = os.environ.get('EXPORT_SNAPSHOT_PATH') or None
+EXPORT_BATCH_ROWS = 65536
+EXPORT_ROW_GROUP_SIZE = 65536
+
+# Capas (/books/<id>/cover): diretório das imagens baixadas na carga (endereçadas pelo
+# SHA-256 do conteúdo), miniaturas geradas (nome -> lado maior em pixels) e validade (s)
+# do cache HTTP das respostas.
+IMAGES_DIR = os.environ.get('IMAGES_DIR', os.path.join(data_dir, 'images'))
+COVER_SIZES = {'small': 100, 'medium': 200}
+COVER_MAX_AGE = 30 * 24 * 3600
+
+# Backend das rotas de leitura: 'sql' (consultas SQLAlchemy) ou 'columnar' (tabela
+# book carregada em arrays NumPy, recarregada quando a versão do dataset muda).
+BOOKS_BACKEND = os.environ.get('BOOKS_BACKEND', 'sql')
+
+# Cache HTTP: ETag / Last-Modified derivados da versão do dataset (respostas 304)
+# e cache em memória das respostas, invalidado quando a versão muda.
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_MAX_AGE = 0
+HTTP_CACHE_EXCLUDED_ENDPOINTS = ['api.health_check', 'api.get_cache_stats', 'api.get_metrics', 'api.get_book_cover']
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 300
+# Intervalo (s) entre leituras da versão do dataset no banco.
+DATASET_VERSION_CHECK_INTERVAL = 1.0
+
+# Instrumentação (opcional): tempo total, tempo em SQL, quantidade de consultas e tempo
+# de serialização por endpoint, expostos em /api/v1/metrics (formato Prometheus).
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+METRICS_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+# Profiler por amostragem: grava em PROFILER_OUTPUT_DIR o perfil (formato folded, para
+# flamegraph.pl / speedscope) das requisições mais lentas que PROFILER_SLOW_THRESHOLD (s).
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '0') == '1'
+PROFILER_INTERVAL = 0.005
+PROFILER_SLOW_THRESHOLD = float(os.environ.get('PROFILER_SLOW_THRESHOLD', '0.5'))
+PROFILER_OUTPUT_DIR = os.path.join(data_dir, 'profiles')
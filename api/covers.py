@@ -0,0 +1,62 @@
+import os
+from flask import current_app, request, abort, send_file
+from sqlalchemy.exc import OperationalError
+from . import db
+from .models import Book, BookImage
+
+ORIGINAL = 'original'
+# Extensão dos originais por tipo de imagem; as miniaturas são sempre JPEG.
+IMAGE_EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'image/webp': 'webp'}
+THUMBNAIL_MIMETYPE = 'image/jpeg'
+
+
+def image_path(root, sha256, extension, size=ORIGINAL):
+    """
+    Caminho de uma imagem no armazenamento local: <root>/<tamanho>/<2 primeiros
+    caracteres do hash>/<hash>.<extensão>. O tamanho é 'original' ou um nome de COVER_SIZES.
+    """
+    return os.path.join(root, size, sha256[:2], f'{sha256}.{extension}')
+
+
+def thumbnail_path(root, sha256, size):
+    return image_path(root, sha256, 'jpg', size)
+
+
+def _book_image(book_id):
+    """(sha256, mimetype) da capa baixada do livro, ou None (livro inexistente ou capa não baixada)."""
+    try:
+        return db.session.execute(
+            db.select(BookImage.sha256, BookImage.mimetype)
+            .join(Book, Book.imagem_url == BookImage.imagem_url)
+            .where(Book.id == book_id)
+        ).first()
+    except OperationalError:
+        # Banco criado antes da tabela book_image: nenhuma capa baixada.
+        db.session.rollback()
+        return None
+
+
+def cover_response(book_id):
+    """
+    Capa do livro (original ou miniatura `size`) lida do armazenamento local com send_file:
+    o servidor WSGI pode enviar o arquivo direto do disco (wsgi.file_wrapper, sendfile no
+    gunicorn). O ETag é o hash do conteúdo e a resposta pode ficar em cache por COVER_MAX_AGE.
+    """
+    size = request.args.get('size', ORIGINAL)
+    sizes = current_app.config['COVER_SIZES']
+    if size != ORIGINAL and size not in sizes:
+        abort(400, description=f"O parâmetro 'size' deve ser um de: {', '.join([ORIGINAL, *sizes])}.")
+    image = _book_image(book_id)
+    if image is None:
+        abort(404)
+    root = current_app.config['IMAGES_DIR']
+    if size == ORIGINAL:
+        path, mimetype = image_path(root, image.sha256, IMAGE_EXTENSIONS[image.mimetype]), image.mimetype
+    else:
+        path, mimetype = thumbnail_path(root, image.sha256, size), THUMBNAIL_MIMETYPE
+    if not os.path.exists(path):
+        abort(404)
+    response = send_file(path, mimetype=mimetype, etag=f'{image.sha256}-{size}', conditional=True,
+                         max_age=current_app.config['COVER_MAX_AGE'])
+    response.cache_control.public = True
+    return response
@@ -0,0 +1,69 @@
+import threading
+
+DOCS_MODES = ('lazy', 'eager', 'off')
+# Rotas registradas pelo Flasgger: Swagger UI e spec JSON (caminhos exatos; '/apidocs' redireciona
+# para '/apidocs/') e arquivos estáticos da UI (tudo abaixo do prefixo).
+DOCS_PATHS = frozenset({'/apidocs', '/apidocs/', '/apidocs/index.html', '/apispec_1.json', '/oauth2-redirect.html'})
+DOCS_STATIC_PREFIX = '/flasgger_static/'
+
+
+def is_docs_path(path):
+    return path in DOCS_PATHS or path.startswith(DOCS_STATIC_PREFIX)
+
+
+def build_docs_app(app):
+    """
+    App Flask só com a documentação: o Flasgger sobre as mesmas rotas da API (o
+    blueprint de api.routes), para gerar a spec a partir das docstrings.
+    """
+    from flask import Flask
+    from flasgger import Swagger
+    from . import routes
+
+    docs = Flask(app.import_name)
+    docs.config.update(app.config)
+    Swagger(docs)
+    docs.register_blueprint(routes.bp)
+    return docs
+
+
+class LazyDocs:
+    """
+    Middleware WSGI que encaminha as rotas do Swagger (ver is_docs_path) para o app de
+    documentação, montado no primeiro acesso. Assim o import do Flasgger (e do
+    jsonschema) sai da inicialização da API e dos workers do gunicorn.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.docs_app = None
+        self.lock = threading.Lock()
+
+    def _docs(self):
+        if self.docs_app is None:
+            with self.lock:
+                if self.docs_app is None:
+                    self.docs_app = build_docs_app(self.app)
+        return self.docs_app
+
+    def __call__(self, environ, start_response):
+        if is_docs_path(environ.get('PATH_INFO', '')):
+            return self._docs()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def init_app(app):
+    """
+    Documentação Swagger conforme API_DOCS: 'lazy' (montada no primeiro acesso a
+    /apidocs), 'eager' (Flasgger registrado no próprio app) ou 'off'.
+    """
+    mode = app.config['API_DOCS']
+    if mode not in DOCS_MODES:
+        raise ValueError(f"API_DOCS inválido: {mode!r} (use {', '.join(DOCS_MODES)}).")
+    if mode == 'eager':
+        from flasgger import Swagger
+
+        Swagger(app)
+    elif mode == 'lazy':
+        app.wsgi_app = LazyDocs(app)
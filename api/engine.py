@@ -0,0 +1,18 @@
+from sqlalchemy import event
+from . import db
+
+
+def init_app(app):
+    """Aplica SQLITE_PRAGMAS (mmap_size, cache_size...) a cada conexão SQLite aberta pelo pool."""
+    pragmas = app.config['SQLITE_PRAGMAS']
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,197 @@
+import io
+import os
+import threading
+from flask import current_app, request, Response, stream_with_context
+from . import db
+from .models import Book
+from .pagination import BOOK_FIELDS, parse_number
+
+# Tipos das colunas no snapshot: categoria e rating têm poucos valores distintos e são
+# gravados com dictionary encoding (índices inteiros + tabela de valores).
+_COLUMN_TYPES = {
+    'id': 'int64',
+    'titulo': 'string',
+    'preco': 'float64',
+    'rating': 'dictionary',
+    'rating_numerico': 'int8',
+    'disponibilidade': 'string',
+    'categoria': 'dictionary',
+    'imagem_url': 'string',
+}
+EXPORT_FORMATS = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'csv': 'text/csv',
+}
+VERSION_METADATA_KEY = b'dataset_version'
+
+_build_lock = threading.Lock()
+
+
+def export_schema(metadata=None):
+    import pyarrow as pa
+
+    types = {
+        'int64': pa.int64(), 'int8': pa.int8(), 'float64': pa.float64(), 'string': pa.string(),
+        'dictionary': pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([(field, types[_COLUMN_TYPES[field]]) for field in BOOK_FIELDS], metadata=metadata)
+
+
+def build_table(conn, versao=None):
+    """Lê a tabela book (em ordem de id) para uma tabela Arrow com o schema do snapshot."""
+    import pyarrow as pa
+
+    columns = {field: [] for field in BOOK_FIELDS}
+    result = conn.exec_driver_sql(f"SELECT {', '.join(BOOK_FIELDS)} FROM book ORDER BY id")
+    for rows in result.partitions(current_app.config['EXPORT_BATCH_ROWS']):
+        for field, values in zip(BOOK_FIELDS, zip(*rows)):
+            columns[field].extend(values)
+
+    schema = export_schema({VERSION_METADATA_KEY: versao or ''})
+    arrays = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(columns[field.name], type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(columns[field.name], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def snapshot_path():
+    """
+    Caminho do snapshot Parquet: EXPORT_SNAPSHOT_PATH ou, se não configurado, o arquivo
+    .parquet ao lado do banco (data/books.db -> data/books.parquet).
+    """
+    path = current_app.config['EXPORT_SNAPSHOT_PATH']
+    if path:
+        return path
+    database = db.engine.url.database or ''
+    if database.startswith('file:'):
+        database = database[len('file:'):]
+    return os.path.splitext(database)[0] + '.parquet'
+
+
+def write_snapshot(conn, path, versao=None):
+    """
+    Grava o snapshot Parquet da tabela book (troca atômica do arquivo), com a versão do
+    dataset nos metadados. Retorna a quantidade de livros gravados.
+    """
+    import pyarrow.parquet as pq
+
+    table = build_table(conn, versao)
+    tmp_path = f'{path}.tmp'
+    pq.write_table(table, tmp_path, compression='zstd',
+                   row_group_size=current_app.config['EXPORT_ROW_GROUP_SIZE'])
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def _current_version():
+    version = current_app.extensions['dataset_version'].get()
+    return version[0] if version is not None else None
+
+
+def export_dataset():
+    """
+    Dataset Arrow de onde o export lê: o snapshot Parquet quando ele corresponde à versão
+    atual do dataset; senão, uma tabela montada do banco e mantida em memória até a
+    próxima versão (ex.: banco carregado sem gerar o snapshot).
+    """
+    import pyarrow.dataset as ds
+
+    versao = _current_version()
+    path = snapshot_path()
+    if versao is not None and os.path.exists(path):
+        dataset = ds.dataset(path, format='parquet')
+        if (dataset.schema.metadata or {}).get(VERSION_METADATA_KEY, b'').decode() == versao:
+            return dataset
+
+    cached = current_app.extensions.get('export_table')
+    if cached is None or cached[0] != versao or versao is None:
+        with _build_lock:
+            cached = current_app.extensions.get('export_table')
+            if cached is None or cached[0] != versao or versao is None:
+                cached = (versao, build_table(db.session.connection(), versao))
+                current_app.extensions['export_table'] = cached
+    return ds.InMemoryDataset(cached[1])
+
+
+def parse_export_filter():
+    """
+    Filtro (expressão Arrow) montado de category, min_price, max_price e min_rating.
+    Aplicado na leitura do Parquet, o filtro descarta row groups pelas estatísticas.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    conditions = []
+    category = request.args.get('category', '').strip()
+    if category:
+        # Mesma regra da busca: categoria exata sem diferenciar maiúsculas de minúsculas.
+        names = [row[0] for row in db.session.query(Book.categoria).filter(
+            Book.categoria.collate('NOCASE') == category).distinct()]
+        conditions.append(ds.field('categoria').isin(pa.array(names, type=pa.string())))
+    min_price = parse_number('min_price', float)
+    if min_price is not None:
+        conditions.append(ds.field('preco') >= min_price)
+    max_price = parse_number('max_price', float)
+    if max_price is not None:
+        conditions.append(ds.field('preco') <= max_price)
+    min_rating = parse_number('min_rating', int, 1, 5)
+    if min_rating is not None:
+        conditions.append(ds.field('rating_numerico') >= min_rating)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _writer(export_format, sink, schema):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    if export_format == 'parquet':
+        return pq.ParquetWriter(sink, schema, compression='zstd')
+    if export_format == 'arrow':
+        return pa.ipc.new_stream(sink, schema)
+    return pacsv.CSVWriter(sink, schema)
+
+
+def _drain(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def export_response(export_format, fields):
+    """
+    Resposta em streaming com os livros filtrados no formato pedido. Cada lote lido do
+    dataset (EXPORT_BATCH_ROWS linhas) é escrito e enviado em seguida; no Parquet cada
+    lote vira um row group.
+    """
+    import pyarrow as pa
+
+    fields = list(dict.fromkeys(fields))
+    dataset = export_dataset()
+    expression = parse_export_filter()
+    schema = pa.schema([dataset.schema.field(field) for field in fields])
+    batches = dataset.to_batches(columns=fields, filter=expression,
+                                 batch_size=current_app.config['EXPORT_BATCH_ROWS'])
+
+    def generate():
+        buffer = io.BytesIO()
+        writer = _writer(export_format, buffer, schema)
+        for batch in batches:
+            if batch.num_rows:
+                writer.write_batch(batch)
+                yield _drain(buffer)
+        writer.close()
+        yield _drain(buffer)
+
+    response = Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename=books.{export_format}'
+    return response
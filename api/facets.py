@@ -0,0 +1,248 @@
+import math
+from flask import current_app, request, jsonify
+from . import db
+from .models import Book
+from .batch import MAX_BOOK_ID
+from .pagination import parse_number, parse_fields, selected_columns
+from .aggregates import book_filters, price_bucket
+from .columnar import columnar_store, _nocase
+from .search import fts_available, fts_match_expression, title_matches
+
+RATINGS = range(1, 6)
+
+
+def init_app(app):
+    """Cache das agregações da busca facetada no backend SQL (FACETS_CACHE_SIZE entradas)."""
+    from .cache import ResponseCache
+
+    app.extensions['facets_cache'] = ResponseCache(app.config['FACETS_CACHE_SIZE'], float('inf'))
+
+
+def parse_facet_args():
+    """
+    Lê os filtros e a paginação de /books/facets: title, category (pode repetir),
+    min_rating / max_rating, min_price / max_price, page, page_size, buckets e fields.
+    """
+    config = current_app.config
+    page_size = parse_number('page_size', int, 1, config['BOOKS_MAX_PAGE_SIZE']) or config['FACETS_PAGE_SIZE']
+    return {
+        'title': request.args.get('title', '').strip(),
+        'categories': [name.strip() for name in request.args.getlist('category') if name.strip()],
+        'min_rating': parse_number('min_rating', int, 1, 5),
+        'max_rating': parse_number('max_rating', int, 1, 5),
+        'min_price': parse_number('min_price', float),
+        'max_price': parse_number('max_price', float),
+        # O OFFSET da página, (page - 1) * page_size, precisa caber num INTEGER do SQLite.
+        'page': parse_number('page', int, 1, MAX_BOOK_ID // page_size + 1) or 1,
+        'page_size': page_size,
+        'buckets': parse_number('buckets', int, 1, config['FACETS_MAX_PRICE_BUCKETS']) or config['FACETS_PRICE_BUCKETS'],
+        'fields': parse_fields(),
+    }
+
+
+def _category_matcher(args):
+    """Categoria exata sem diferenciar maiúsculas de minúsculas (como em /books/search)."""
+    selected = {_nocase(name) for name in args['categories']}
+    return lambda name: not selected or _nocase(name) in selected
+
+
+def _rating_matcher(args):
+    low, high = args['min_rating'], args['max_rating']
+    if low is None and high is None:
+        return lambda rating: True
+    low, high = low or 1, high or 5
+    return lambda rating: rating is not None and low <= rating <= high
+
+
+def count_facets(cube, args):
+    """
+    Total e contagens das facetas a partir das células (categoria, rating, faixa de preço,
+    dentro da faixa de preço pedida, quantidade) da agregação. Cada faceta aplica todos os
+    filtros menos o seu: as contagens de categoria mostram quantos livros cada categoria
+    teria com os demais filtros, e assim por diante.
+    Retorna (total, facetas, categorias selecionadas presentes na agregação).
+    """
+    category_ok, rating_ok = _category_matcher(args), _rating_matcher(args)
+    total = 0
+    por_categoria, nomes = {}, set()
+    por_rating = dict.fromkeys(RATINGS, 0)
+    por_faixa = [0] * args['buckets']
+    for categoria, rating, faixa, in_price, quantidade in cube:
+        categoria_ok, nota_ok = category_ok(categoria), rating_ok(rating)
+        if categoria_ok:
+            nomes.add(categoria)
+        if nota_ok and in_price:
+            por_categoria[categoria] = por_categoria.get(categoria, 0) + quantidade
+        if categoria_ok and in_price and rating in por_rating:
+            por_rating[rating] += quantidade
+        if categoria_ok and nota_ok:
+            por_faixa[faixa] += quantidade
+            if in_price:
+                total += quantidade
+    facetas = {
+        'categorias': [
+            {'categoria': nome, 'quantidade': quantidade}
+            for nome, quantidade in sorted(por_categoria.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'ratings': [{'rating_numerico': rating, 'quantidade': quantidade} for rating, quantidade in por_rating.items()],
+        'precos': por_faixa,
+    }
+    return total, facetas, nomes
+
+
+def _price_edges(menor, maior, buckets):
+    """Largura das faixas de preço (mesma regra de aggregates.price_histogram) e seus limites."""
+    largura = (maior - menor) / buckets or 1.0
+    return largura, [(round(menor + i * largura, 2), round(menor + (i + 1) * largura, 2)) for i in range(buckets)]
+
+
+# --- Backend SQL ---
+
+def _sql_price_conditions(args):
+    conditions = []
+    if args['min_price'] is not None:
+        conditions.append(Book.preco >= args['min_price'])
+    if args['max_price'] is not None:
+        conditions.append(Book.preco <= args['max_price'])
+    return conditions
+
+
+def _cached_cube(key, compute):
+    """
+    Células da agregação para os filtros de título e de preço em `key`. Elas não dependem
+    dos filtros de categoria e de rating nem da página, então ficam em cache até a versão
+    do dataset mudar: marcar uma categoria ou trocar de página não varre a tabela de novo.
+    """
+    cache = current_app.extensions['facets_cache']
+    version = current_app.extensions['dataset_version'].get()
+    versao = version[0] if version is not None else None
+    if versao is not None:
+        entry = cache.get(key, versao)
+        if entry is not None:
+            return entry['body']
+    cube = [tuple(cell) for cell in compute()]
+    if versao is not None:
+        cache.put(key, versao, 200, None, [], cube)
+    return cube
+
+
+def _sql_facets(args):
+    # min() e max() em consultas separadas: sozinhos, cada um é uma busca no índice de preço.
+    menor = db.session.execute(db.select(db.func.min(Book.preco))).scalar()
+    maior = db.session.execute(db.select(db.func.max(Book.preco))).scalar()
+    if menor is None:
+        return 0, count_facets([], args)[1], [], []
+
+    largura, edges = _price_edges(menor, maior, args['buckets'])
+    conditions = book_filters(title=args['title'])
+    price_conditions = _sql_price_conditions(args)
+    faixa = price_bucket(menor, largura, args['buckets'])
+    in_price = db.case((db.and_(*price_conditions), 1), else_=0) if price_conditions else db.literal(1)
+    # Uma única varredura agrupada: categoria x rating x faixa de preço x dentro da faixa pedida.
+    # A faixa de preço vem primeiro no GROUP BY: assim o SQLite lê a tabela em sequência em vez
+    # de percorrer o índice de categoria com um acesso aleatório por livro.
+    key = (args['title'], args['buckets'], args['min_price'], args['max_price'])
+    cube = _cached_cube(key, lambda: db.session.execute(
+        db.select(Book.categoria, Book.rating_numerico, faixa, in_price, db.func.count())
+        .where(*conditions)
+        .group_by(faixa, in_price, Book.rating_numerico, Book.categoria)
+    ).all())
+    total, facetas, nomes = count_facets(cube, args)
+    if not total:
+        return total, facetas, edges, []
+
+    conditions += price_conditions
+    if args['categories']:
+        conditions.append(Book.categoria.in_(sorted(nomes)))
+    if args['min_rating'] is not None:
+        conditions.append(Book.rating_numerico >= args['min_rating'])
+    if args['max_rating'] is not None:
+        conditions.append(Book.rating_numerico <= args['max_rating'])
+    columns = selected_columns(args['fields'])
+    rows = db.session.execute(
+        db.select(*(getattr(Book, column) for column in columns)).where(*conditions).order_by(Book.id)
+        .limit(args['page_size']).offset((args['page'] - 1) * args['page_size'])
+    ).all()
+    return total, facetas, edges, rows
+
+
+# --- Backend colunar ---
+
+def _title_positions(store, title):
+    """Posições (em ordem de id) dos livros cujo título casa com `title`, como em book_filters."""
+    import numpy as np
+
+    expression = fts_match_expression(title)
+    if expression and fts_available():
+        rowids = db.session.execute(db.select(title_matches(expression).c.rowid)).scalars().all()
+        return np.sort(store.positions_of(rowids))
+    return store.title_like(title)
+
+
+def _columnar_facets(store, args):
+    import numpy as np
+
+    if not store.size:
+        return 0, count_facets([], args)[1], [], []
+
+    buckets = args['buckets']
+    menor, maior = store.sorted_prices[0].item(), store.sorted_prices[-1].item()
+    largura, edges = _price_edges(menor, maior, buckets)
+    positions = _title_positions(store, args['title']) if args['title'] else store.all()
+    codes = store.category_codes[positions]
+    ratings = np.maximum(store.rating_numerico[positions], 0)  # 0 = sem rating
+    precos = store.preco[positions]
+    faixas = np.minimum(((precos - menor) / largura).astype(np.int64), buckets - 1)
+    in_price = np.ones(len(positions), dtype=bool)
+    if args['min_price'] is not None:
+        in_price &= precos >= args['min_price']
+    if args['max_price'] is not None:
+        in_price &= precos <= args['max_price']
+
+    # Mesma agregação do SQL: uma contagem (bincount) por combinação dos quatro códigos.
+    keys = ((codes * 6 + ratings) * buckets + faixas) * 2 + in_price
+    counts = np.bincount(keys)
+    cells = np.flatnonzero(counts)
+    cube = [
+        (store.categories[key // (12 * buckets)], (key // (2 * buckets)) % 6 or None,
+         (key // 2) % buckets, key % 2, count)
+        for key, count in zip(cells.tolist(), counts[cells].tolist())
+    ]
+    total, facetas, nomes = count_facets(cube, args)
+    if not total:
+        return total, facetas, edges, []
+
+    mask = in_price
+    if args['categories']:
+        mask &= np.isin(codes, [code for code, name in enumerate(store.categories) if name in nomes])
+    if args['min_rating'] is not None:
+        mask &= ratings >= args['min_rating']
+    if args['max_rating'] is not None:
+        mask &= (ratings <= args['max_rating']) & (ratings > 0)
+    start = (args['page'] - 1) * args['page_size']
+    page = positions[mask][start:start + args['page_size']]
+    return total, facetas, edges, list(store.rows(page, selected_columns(args['fields'])))
+
+
+def facets_response():
+    """
+    Resposta de /books/facets: uma página dos livros que atendem a todos os filtros e as
+    contagens por categoria, por rating e por faixa de preço, calculadas numa única
+    agregação sobre os livros do filtro de título.
+    """
+    args = parse_facet_args()
+    store = columnar_store()
+    total, facetas, edges, rows = _columnar_facets(store, args) if store is not None else _sql_facets(args)
+    fields = args['fields']
+    facetas['precos'] = [
+        {'inicio': inicio, 'fim': fim, 'quantidade': quantidade}
+        for (inicio, fim), quantidade in zip(edges, facetas['precos'])
+    ]
+    return jsonify({
+        'total': total,
+        'pagina': args['page'],
+        'por_pagina': args['page_size'],
+        'paginas': math.ceil(total / args['page_size']),
+        'livros': [dict(zip(fields, row)) for row in rows],
+        'facetas': facetas,
+    })
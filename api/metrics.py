@@ -0,0 +1,310 @@
+import os
+import sys
+import time
+import threading
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from flask import request, g, has_request_context
+from sqlalchemy import event
+from werkzeug.wsgi import ClosingIterator
+from . import db
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Histograma no modelo do Prometheus (buckets cumulativos, soma e contagem) por conjunto de labels."""
+
+    def __init__(self, name, description, label_names, buckets):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            serie = self.series.get(labels)
+            if serie is None:
+                serie = self.series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                serie['buckets'][index] += 1
+            serie['sum'] += value
+            serie['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for labels, serie in sorted(self.series.items()):
+                acumulado = 0
+                for bound, count in zip(self.buckets, serie['buckets']):
+                    acumulado += count
+                    le = 'le="%g"' % bound
+                    lines.append(f'{self.name}_bucket{_labels(self.label_names, labels, le)} {acumulado}')
+                le = 'le="+Inf"'
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, labels, le)} {serie["count"]}')
+                lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {serie["sum"]:.6f}')
+                lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {serie["count"]}')
+        return lines
+
+
+class CounterMetric:
+    """Contador do Prometheus por conjunto de labels."""
+
+    def __init__(self, name, description, label_names):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.values = Counter()
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.values[labels] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class MetricsRegistry:
+    """Métricas da API deste processo (cada worker do gunicorn tem as suas)."""
+
+    def __init__(self, buckets):
+        self.duration = Histogram(
+            'books_api_request_duration_seconds', 'Tempo total da requisição, incluindo o envio do corpo.',
+            ('endpoint',), buckets)
+        self.sql = Histogram(
+            'books_api_sql_duration_seconds',
+            'Tempo de execução das consultas SQL por requisição (cursor.execute; a leitura das linhas fica de fora).',
+            ('endpoint',), buckets)
+        self.serialization = Histogram(
+            'books_api_serialization_duration_seconds', 'Tempo gasto serializando JSON por requisição.',
+            ('endpoint',), buckets)
+        self.queries = Histogram(
+            'books_api_sql_queries_per_request', 'Quantidade de consultas SQL por requisição.',
+            ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.requests = CounterMetric(
+            'books_api_requests_total', 'Requisições atendidas, por endpoint e status.', ('endpoint', 'status'))
+        self.slow_profiles = CounterMetric(
+            'books_api_slow_request_profiles_total', 'Perfis gravados de requisições lentas.', ('endpoint',))
+
+    def record(self, endpoint, status, medicao, total):
+        labels = (endpoint,)
+        self.duration.observe(labels, total)
+        self.sql.observe(labels, medicao['sql'])
+        self.serialization.observe(labels, medicao['serializacao'])
+        self.queries.observe(labels, medicao['consultas'])
+        self.requests.inc((endpoint, status))
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.duration, self.sql, self.serialization, self.queries, self.slow_profiles):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _fold(frame):
+    """Pilha no formato 'folded' (raiz;...;folha), usado por flamegraph.pl e speedscope."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem: uma thread lê, a cada `interval` segundos, a pilha das
+    threads que estão atendendo requisições (sys._current_frames) e conta as pilhas.
+    Ao final de uma requisição mais lenta que `threshold`, as contagens são gravadas em
+    `output_dir` no formato folded (uma pilha por linha seguida do número de amostras).
+    """
+
+    def __init__(self, interval, threshold, output_dir):
+        self.interval = interval
+        self.threshold = threshold
+        self.output_dir = output_dir
+        self.active = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self, ident):
+        with self.lock:
+            self.active[ident] = Counter()
+            if self.thread is None or not self.thread.is_alive():
+                # Criada sob demanda: num worker do gunicorn (pós-fork) a thread do master não existe.
+                self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self.thread.start()
+
+    def stop(self, ident):
+        with self.lock:
+            return self.active.pop(ident, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, stacks in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[_fold(frame)] += 1
+
+    def dump(self, stacks, endpoint, seconds):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        path = os.path.join(self.output_dir, f'{stamp}-{endpoint}-{int(seconds * 1000)}ms.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        return path
+
+
+def timed_json_provider(app):
+    """
+    Envolve o provider JSON do app (ver api/serialization.py) para somar o tempo de
+    serialização na medição da requisição.
+    """
+
+    class TimedJSONProvider(type(app.json)):
+        def dumps(self, obj, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return super().dumps(obj, **kwargs)
+            finally:
+                _add_time('serializacao', time.perf_counter() - inicio)
+
+        def dumps_bytes(self, obj):
+            inicio = time.perf_counter()
+            try:
+                return super().dumps_bytes(obj)
+            finally:
+                _add_time('serializacao', time.perf_counter() - inicio)
+
+    return TimedJSONProvider(app)
+
+
+def _add_time(campo, segundos):
+    if has_request_context():
+        medicao = g.get('metrics')
+        if medicao is not None:
+            medicao[campo] += segundos
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_inicio', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info['metrics_inicio'].pop()
+    if has_request_context():
+        medicao = g.get('metrics')
+        if medicao is not None:
+            medicao['sql'] += time.perf_counter() - inicio
+            medicao['consultas'] += 1
+
+
+def _close_with(response, callback):
+    """
+    Chama callback quando o servidor fecha o corpo de uma resposta direct_passthrough (ex.:
+    send_file com wsgi.file_wrapper): o werkzeug entrega esse corpo direto ao servidor e
+    response.close(), que dispara os call_on_close, nunca é chamado. O close do próprio
+    iterável é substituído, mantendo o mesmo objeto para o sendfile do gunicorn.
+    """
+    iterable = response.response
+    close = getattr(iterable, 'close', None)
+
+    def fechar():
+        try:
+            if close is not None:
+                close()
+        finally:
+            callback()
+
+    try:
+        iterable.close = fechar
+    except AttributeError:
+        response.response = ClosingIterator(iterable, callback)
+
+
+def init_app(app):
+    """
+    Registra a instrumentação opcional: com METRICS_ENABLED, mede por requisição o tempo
+    total, o tempo em SQL (eventos do SQLAlchemy), a quantidade de consultas e o tempo de
+    serialização JSON, servidos em /api/v1/metrics. Com PROFILER_ENABLED, grava o perfil
+    por amostragem das requisições mais lentas que PROFILER_SLOW_THRESHOLD.
+    """
+    metrics_enabled = app.config['METRICS_ENABLED']
+    profiler_enabled = app.config['PROFILER_ENABLED']
+    if not metrics_enabled and not profiler_enabled:
+        return
+    registry = MetricsRegistry(app.config['METRICS_BUCKETS']) if metrics_enabled else None
+    profiler = SamplingProfiler(
+        app.config['PROFILER_INTERVAL'], app.config['PROFILER_SLOW_THRESHOLD'], app.config['PROFILER_OUTPUT_DIR']
+    ) if profiler_enabled else None
+    if registry is not None:
+        app.extensions['metrics'] = registry
+    if profiler is not None:
+        app.extensions['profiler'] = profiler
+
+    app.json = timed_json_provider(app)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_measurement():
+        g.metrics = {'inicio': time.perf_counter(), 'sql': 0.0, 'serializacao': 0.0, 'consultas': 0}
+        if profiler is not None:
+            profiler.start(threading.get_ident())
+
+    @app.after_request
+    def finish_measurement(response):
+        medicao = g.get('metrics')
+        if medicao is None:
+            return response
+        endpoint = request.endpoint or 'desconhecido'
+        status = response.status_code
+        ident = threading.get_ident()
+
+        def finish():
+            # Chamado quando o corpo termina de ser enviado: inclui o streaming.
+            total = time.perf_counter() - medicao['inicio']
+            if registry is not None:
+                registry.record(endpoint, status, medicao, total)
+            if profiler is not None:
+                stacks = profiler.stop(ident)
+                if stacks and total >= profiler.threshold:
+                    profiler.dump(stacks, endpoint, total)
+                    if registry is not None:
+                        registry.slow_profiles.inc((endpoint,))
+
+        if response.direct_passthrough:
+            _close_with(response, finish)
+        else:
+            response.call_on_close(finish)
+        return response
@@ -1,13 +1,21 @@
 from . import db
 from werkzeug.security import generate_password_hash, check_password_hash
 
+# Valor numérico de cada rating do site, gravado em Book.rating_numerico.
+RATING_VALUES = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
+
 class Book(db.Model):
+    __table_args__ = (
+        db.Index('uq_book_titulo_imagem_url', 'titulo', 'imagem_url', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(255), nullable=False)
-    preco = db.Column(db.Float, nullable=False)
+    preco = db.Column(db.Float, nullable=False, index=True)
     rating = db.Column(db.String(20))
+    rating_numerico = db.Column(db.Integer)
     disponibilidade = db.Column(db.String(50))
-    categoria = db.Column(db.String(100), nullable=False)
+    categoria = db.Column(db.String(100), nullable=False, index=True)
     imagem_url = db.Column(db.String(255))
 
     def to_dict(self):
@@ -17,7 +25,42 @@ class Book(db.Model):
             'titulo': self.titulo,
             'preco': self.preco,
             'rating': self.rating,
+            'rating_numerico': self.rating_numerico,
             'disponibilidade': self.disponibilidade,
             'categoria': self.categoria,
             'imagem_url': self.imagem_url
-        }
\ No newline at end of file
+        }
+
+
+class StatsSnapshot(db.Model):
+    """Estatísticas pré-calculadas (JSON) recalculadas ao final de cada carga."""
+    __tablename__ = 'stats_snapshot'
+
+    nome = db.Column(db.String(50), primary_key=True)
+    dados = db.Column(db.Text, nullable=False)
+    gerado_em = db.Column(db.DateTime, nullable=False)
+
+
+class DatasetVersion(db.Model):
+    """Versão do dataset (linha única, id=1), trocada a cada carga que altera os livros."""
+    __tablename__ = 'dataset_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    versao = db.Column(db.String(32), nullable=False)
+    atualizado_em = db.Column(db.DateTime, nullable=False)
+
+
+class BookImage(db.Model):
+    """Capa baixada para o armazenamento local (IMAGES_DIR), endereçada pelo SHA-256 do conteúdo."""
+    __tablename__ = 'book_image'
+
+    imagem_url = db.Column(db.String(255), primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False)
+    mimetype = db.Column(db.String(50), nullable=False)
+    baixada_em = db.Column(db.DateTime, nullable=False)
+
+
+# Índice para o filtro exato e case-insensitive por categoria (categoria = ? COLLATE NOCASE).
+db.Index('ix_book_categoria_nocase', db.collate(Book.categoria, 'NOCASE'))
+# Atende /books/top-rated: filtro por rating mínimo e ordenação por rating (maior primeiro).
+db.Index('ix_book_rating_numerico', Book.rating_numerico.desc())
@@ -0,0 +1,162 @@
+import math
+from flask import current_app, jsonify, request, abort, Response, stream_with_context
+from .models import Book
+from .batch import MAX_BOOK_ID
+
+BOOK_FIELDS = [column.name for column in Book.__table__.columns]
+STREAM_FORMATS = ('ndjson', 'json')
+STREAM_CHUNK_SIZE = 1000
+
+
+def _parse_int(name, minimum, maximum=None):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        abort(400, description=f"O parâmetro '{name}' deve ser um número inteiro.")
+    if value < minimum:
+        abort(400, description=f"O parâmetro '{name}' deve ser maior ou igual a {minimum}.")
+    if maximum is not None and value > maximum:
+        abort(400, description=f"O parâmetro '{name}' deve ser no máximo {maximum}.")
+    return value
+
+
+def parse_number(name, cast, minimum=None, maximum=None):
+    """
+    Lê um parâmetro numérico opcional (None se ausente), validando os limites minimum e
+    maximum quando informados. Recusa valores não finitos (nan, inf).
+    """
+    value = request.args.get(name, '')
+    if value == '':
+        return None
+    try:
+        value = cast(value)
+    except ValueError:
+        abort(400, description=f"O parâmetro '{name}' deve ser numérico.")
+    if not math.isfinite(value):
+        abort(400, description=f"O parâmetro '{name}' deve ser um número finito.")
+    if minimum is not None and value < minimum:
+        abort(400, description=f"O parâmetro '{name}' deve ser maior ou igual a {minimum}.")
+    if maximum is not None and value > maximum:
+        abort(400, description=f"O parâmetro '{name}' deve ser no máximo {maximum}.")
+    return value
+
+
+def parse_fields():
+    """Lê o parâmetro 'fields' (ex.: fields=id,titulo,preco). Sem ele, retorna todos os campos."""
+    fields = request.args.get('fields', '')
+    if not fields:
+        return list(BOOK_FIELDS)
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    invalid = [field for field in selected if field not in BOOK_FIELDS]
+    if invalid or not selected:
+        abort(400, description=f"Campos inválidos: {', '.join(invalid) or fields}. "
+                               f"Campos disponíveis: {', '.join(BOOK_FIELDS)}.")
+    return selected
+
+
+def parse_list_args():
+    """Lê os parâmetros comuns das listagens de livros: limit, after_id, fields e stream."""
+    limit = _parse_int('limit', 1)
+    max_limit = current_app.config['BOOKS_MAX_PAGE_SIZE']
+    if limit is not None and limit > max_limit:
+        abort(400, description=f"O parâmetro 'limit' deve ser no máximo {max_limit}.")
+    stream = request.args.get('stream', '')
+    if stream and stream not in STREAM_FORMATS:
+        abort(400, description=f"O parâmetro 'stream' deve ser um de: {', '.join(STREAM_FORMATS)}.")
+    return {
+        'limit': limit,
+        'after_id': _parse_int('after_id', 0, MAX_BOOK_ID),
+        'fields': parse_fields(),
+        'stream': stream,
+    }
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == STREAM_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stream(rows, fields, stream):
+    # Cada pedaço enviado tem até STREAM_CHUNK_SIZE livros já codificados.
+    dumps_bytes = current_app.json.dumps_bytes
+
+    def generate_ndjson():
+        for chunk in _chunks(rows):
+            yield b''.join(dumps_bytes(dict(zip(fields, row))) + b'\n' for row in chunk)
+
+    def generate_json():
+        yield b'['
+        separator = b''
+        for chunk in _chunks(rows):
+            # Array do pedaço sem os colchetes: os pedaços são concatenados com vírgula.
+            yield separator + dumps_bytes([dict(zip(fields, row)) for row in chunk])[1:-1]
+            separator = b','
+        yield b']\n'
+
+    if stream == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_json()), mimetype='application/json')
+
+
+def selected_columns(fields):
+    """Colunas a selecionar: os campos pedidos e, no fim, o id se não foi pedido (para o cursor)."""
+    return fields if 'id' in fields else fields + ['id']
+
+
+def list_args(order_by_id=True):
+    """parse_list_args(), recusando after_id quando a listagem não está em ordem de id."""
+    args = parse_list_args()
+    if not order_by_id and args['after_id'] is not None:
+        abort(400, description="O parâmetro 'after_id' só pode ser usado com ordenação por id.")
+    return args
+
+
+def rows_response(rows, args, order_by_id=True):
+    """
+    Monta a resposta de uma listagem a partir das linhas já filtradas, ordenadas e
+    limitadas. Cada linha é uma tupla com as colunas de selected_columns(args['fields']).
+    """
+    fields = args['fields']
+    if args['stream']:
+        return _stream(rows, fields, args['stream'])
+
+    rows = list(rows)
+    response = jsonify([dict(zip(fields, row)) for row in rows])
+    if order_by_id and args['limit'] is not None and len(rows) == args['limit']:
+        id_index = selected_columns(fields).index('id')
+        response.headers['X-Next-After-Id'] = str(rows[-1][id_index])
+    return response
+
+
+def book_list_response(query, order_by=None):
+    """
+    Aplica paginação por keyset, projeção de campos e streaming a uma consulta de livros.
+
+    - limit / after_id: retorna no máximo 'limit' livros com id > after_id, em ordem de id.
+      Quando a página vem cheia, o cabeçalho X-Next-After-Id traz o cursor da próxima.
+    - fields: lista de campos separados por vírgula (ex.: id,titulo,preco).
+    - stream=ndjson|json: envia as linhas conforme são lidas do cursor, sem montar a lista
+      inteira em memória (NDJSON ou array JSON em chunks).
+
+    order_by substitui a ordenação padrão por id (ex.: relevância na busca); nesse caso
+    after_id não pode ser usado e o cabeçalho X-Next-After-Id não é enviado.
+    """
+    args = list_args(order_by_id=order_by is None)
+    if args['after_id'] is not None:
+        query = query.filter(Book.id > args['after_id'])
+    query = query.order_by(*(order_by if order_by is not None else [Book.id]))
+    if args['limit'] is not None:
+        query = query.limit(args['limit'])
+    query = query.with_entities(*(getattr(Book, column) for column in selected_columns(args['fields'])))
+
+    rows = query.yield_per(STREAM_CHUNK_SIZE) if args['stream'] else query.all()
+    return rows_response(rows, args, order_by_id=order_by is None)
@@ -1,6 +1,15 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, jsonify, request, abort, current_app
 from . import db
 from .models import Book
+from .pagination import BOOK_FIELDS, book_list_response, parse_fields, selected_columns
+from .serialization import encoded_book
+from .batch import parse_batch_ids, fetch_rows_by_id, batch_payload
+from .export import EXPORT_FORMATS, export_response
+from .facets import facets_response
+from .covers import cover_response
+from .columnar import columnar_store, columnar_list_response
+from .search import fts_available, fts_match_expression, title_matches
+from .stats import read_snapshot, SNAPSHOT_OVERVIEW, SNAPSHOT_CATEGORIES
 
 bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
@@ -15,7 +24,8 @@ def health_check():
       200:
         description: A API está saudável.
     """
-    book_count = Book.query.count()
+    store = columnar_store()
+    book_count = store.size if store is not None else Book.query.count()
     return jsonify({
         'status': 'ok',
         'message': 'API is healthy and connected to the database',
@@ -29,12 +39,36 @@ def get_all_books():
     ---
     tags:
       - Livros
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de livros retornados (paginação por keyset).
+      - name: after_id
+        in: query
+        type: integer
+        required: false
+        description: Retorna apenas livros com id maior que este (use o cabeçalho X-Next-After-Id da página anterior).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos retornados, separados por vírgula (ex. id,titulo,preco).
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        required: false
+        description: Envia a resposta em streaming (NDJSON ou array JSON em chunks).
     responses:
       200:
         description: Uma lista de todos os livros.
     """
-    books = Book.query.all()
-    return jsonify([book.to_dict() for book in books])
+    store = columnar_store()
+    if store is not None:
+        return columnar_list_response(store, store.all())
+    return book_list_response(Book.query)
 
 @bp.route('/books/<int:book_id>', methods=['GET'])
 def get_book_by_id(book_id):
@@ -54,8 +88,99 @@ def get_book_by_id(book_id):
       404:
         description: O livro com o ID especificado não foi encontrado.
     """
-    book = Book.query.get_or_404(book_id)
-    return jsonify(book.to_dict())
+    body = encoded_book(book_id, _load_book)
+    if body is None:
+        abort(404)
+    return current_app.response_class(body, mimetype='application/json')
+
+def _load_book(book_id):
+    """Dicionário do livro (colunas selecionadas direto, sem instanciar Book), ou None."""
+    store = columnar_store()
+    if store is not None:
+        position = store.position(book_id)
+        return store.book(position) if position is not None else None
+    row = Book.query.with_entities(*(getattr(Book, field) for field in BOOK_FIELDS)).filter(Book.id == book_id).first()
+    return dict(zip(BOOK_FIELDS, row)) if row is not None else None
+
+@bp.route('/books/<int:book_id>/cover', methods=['GET'])
+def get_book_cover(book_id):
+    """Capa do livro, servida do armazenamento local (baixada na carga).
+    Original ou miniatura JPEG. A resposta tem ETag (hash do conteúdo) e Cache-Control
+    de longa duração (COVER_MAX_AGE).
+    ---
+    tags:
+      - Livros
+    produces:
+      - image/jpeg
+      - image/png
+    parameters:
+      - name: book_id
+        in: path
+        type: integer
+        required: true
+        description: O ID único do livro.
+      - name: size
+        in: query
+        type: string
+        enum: [original, small, medium]
+        required: false
+        default: original
+        description: Tamanho da imagem (as miniaturas são definidas em COVER_SIZES).
+    responses:
+      200:
+        description: A imagem da capa.
+      304:
+        description: A capa não mudou (If-None-Match).
+      400:
+        description: Tamanho inválido.
+      404:
+        description: Livro inexistente ou capa ainda não baixada.
+    """
+    return cover_response(book_id)
+
+@bp.route('/books/batch', methods=['GET', 'POST'])
+def get_books_batch():
+    """Retorna vários livros pelos IDs em uma única requisição.
+    Os ids vêm no corpo JSON (POST) ou em ?ids=1,2,3 (GET). A lista 'livros' segue a ordem
+    dos ids pedidos, com null para os ids inexistentes, listados também em 'nao_encontrados'.
+    ---
+    tags:
+      - Livros
+    parameters:
+      - name: body
+        in: body
+        required: false
+        description: Apenas no POST.
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 999999]
+      - name: ids
+        in: query
+        type: string
+        required: false
+        description: Apenas no GET. IDs separados por vírgula (ex. 1,2,3).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos retornados, separados por vírgula (ex. id,titulo,preco).
+    responses:
+      200:
+        description: Os livros na ordem pedida e a lista de ids não encontrados.
+      400:
+        description: Lista de ids ausente, inválida ou maior que o limite (BOOKS_BATCH_MAX_IDS).
+    """
+    ids = parse_batch_ids()
+    fields = parse_fields()
+    columns = selected_columns(fields)
+    store = columnar_store()
+    found = store.rows_by_id(ids, columns) if store is not None else fetch_rows_by_id(ids, columns)
+    return jsonify(batch_payload(ids, found, fields))
 
 @bp.route('/books/search', methods=['GET'])
 def search_books():
@@ -68,25 +193,161 @@ def search_books():
         in: query
         type: string
         required: false
-        description: Parte do título do livro para a busca (case-insensitive).
+        description: Palavras do título (case-insensitive). Cada palavra casa por prefixo, ex. "light att".
       - name: category
         in: query
         type: string
         required: false
         description: Categoria exata do livro para a busca (case-insensitive).
+      - name: order
+        in: query
+        type: string
+        enum: [relevance, id]
+        required: false
+        description: Ordenação dos resultados da busca por título. Padrão relevance (ou id quando after_id é usado).
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de livros retornados (paginação por keyset).
+      - name: after_id
+        in: query
+        type: integer
+        required: false
+        description: Retorna apenas livros com id maior que este (use o cabeçalho X-Next-After-Id da página anterior).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos retornados, separados por vírgula (ex. id,titulo,preco).
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        required: false
+        description: Envia a resposta em streaming (NDJSON ou array JSON em chunks).
     responses:
       200:
         description: Uma lista de livros que correspondem aos critérios de busca.
     """
     query = Book.query
-    query_title = request.args.get('title', '').lower()
-    query_category = request.args.get('category', '').lower()
+    order_by = None
+    query_title = request.args.get('title', '').strip()
+    query_category = request.args.get('category', '').strip()
+    order = request.args.get('order') or ('id' if request.args.get('after_id') else 'relevance')
+    if order not in ('relevance', 'id'):
+        abort(400, description="O parâmetro 'order' deve ser 'relevance' ou 'id'.")
+    store = columnar_store()
+    if store is not None:
+        return _columnar_search(store, query_title, query_category, order)
     if query_title:
-        query = query.filter(Book.titulo.ilike(f'%{query_title}%'))
+        expression = fts_match_expression(query_title)
+        if expression and fts_available():
+            matches = title_matches(expression)
+            query = query.join(matches, matches.c.rowid == Book.id)
+            if order == 'relevance':
+                order_by = [matches.c.rank, Book.id]
+        else:
+            query = query.filter(Book.titulo.ilike(f'%{query_title}%'))
     if query_category:
-        query = query.filter(Book.categoria.ilike(f'%{query_category}%'))
-    results = query.all()
-    return jsonify([book.to_dict() for book in results])
+        query = query.filter(Book.categoria.collate('NOCASE') == query_category)
+    return book_list_response(query, order_by=order_by)
+
+def _columnar_search(store, query_title, query_category, order):
+    """search_books() no backend colunar: o FTS5 continua no SQLite, o resto nos arrays."""
+    import numpy as np
+
+    positions = store.all()
+    by_relevance = False
+    if query_title:
+        expression = fts_match_expression(query_title)
+        if expression and fts_available():
+            matches = title_matches(expression)
+            rowids = db.session.execute(
+                db.select(matches.c.rowid).order_by(matches.c.rank, matches.c.rowid)
+            ).scalars().all()
+            positions = store.positions_of(rowids)
+            by_relevance = order == 'relevance'
+            if not by_relevance:
+                positions = np.sort(positions)
+        else:
+            positions = store.title_like(query_title)
+    if query_category:
+        positions = positions[np.isin(positions, store.category(query_category))]
+    return columnar_list_response(store, positions, order_by_id=not by_relevance)
+
+@bp.route('/books/facets', methods=['GET'])
+def get_books_facets():
+    """Busca facetada: livros filtrados (paginados) e contagens por categoria, rating e faixa de preço.
+    Todos os filtros podem ser combinados. As contagens de cada faceta aplicam os demais
+    filtros (ex.: a faceta de categorias ignora o filtro de categoria), para a interface
+    mostrar quantos livros cada opção traria.
+    ---
+    tags:
+      - Livros
+    parameters:
+      - name: title
+        in: query
+        type: string
+        required: false
+        description: Palavras do título (como em /books/search).
+      - name: category
+        in: query
+        type: array
+        items:
+          type: string
+        collectionFormat: multi
+        required: false
+        description: Categorias exatas (case-insensitive); repita o parâmetro para mais de uma.
+      - name: min_rating
+        in: query
+        type: integer
+        required: false
+        description: Rating numérico mínimo (1 a 5).
+      - name: max_rating
+        in: query
+        type: integer
+        required: false
+        description: Rating numérico máximo (1 a 5).
+      - name: min_price
+        in: query
+        type: number
+        format: float
+        required: false
+        description: Preço mínimo.
+      - name: max_price
+        in: query
+        type: number
+        format: float
+        required: false
+        description: Preço máximo.
+      - name: page
+        in: query
+        type: integer
+        required: false
+        description: Página dos livros, a partir de 1 (em ordem de id).
+      - name: page_size
+        in: query
+        type: integer
+        required: false
+        description: Livros por página (padrão FACETS_PAGE_SIZE).
+      - name: buckets
+        in: query
+        type: integer
+        required: false
+        description: Quantidade de faixas de preço, de mesma largura entre o menor e o maior preço do catálogo.
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos dos livros retornados, separados por vírgula (ex. id,titulo,preco).
+    responses:
+      200:
+        description: Total, página de livros e facetas (categorias, ratings e precos).
+      400:
+        description: Filtros, paginação ou campos inválidos.
+    """
+    return facets_response()
 
 @bp.route('/categories', methods=['GET'])
 def get_all_categories():
@@ -98,22 +359,79 @@ def get_all_categories():
       200:
         description: Uma lista ordenada de todas as categorias de livros disponíveis.
     """
+    store = columnar_store()
+    if store is not None:
+        return jsonify(store.categories)
     categories_query = db.session.query(Book.categoria).distinct().order_by(Book.categoria)
     categories = [row[0] for row in categories_query]
     return jsonify(categories)
 
 @bp.route('/books/top-rated', methods=['GET'])
 def get_top_rated_books():
-    """Lista os livros com a melhor avaliação (Five).
+    """Lista os livros com a melhor avaliação (Five por padrão).
     ---
     tags:
       - Livros
+    parameters:
+      - name: min_rating
+        in: query
+        type: integer
+        minimum: 1
+        maximum: 5
+        required: false
+        description: Rating mínimo, de 1 a 5 (padrão 5).
+      - name: order
+        in: query
+        type: string
+        enum: [id, rating, preco]
+        required: false
+        description: Ordenação por id (padrão), por rating (maior primeiro) ou por preço (menor primeiro).
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de livros retornados (paginação por keyset).
+      - name: after_id
+        in: query
+        type: integer
+        required: false
+        description: Retorna apenas livros com id maior que este (use o cabeçalho X-Next-After-Id da página anterior).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos retornados, separados por vírgula (ex. id,titulo,preco).
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        required: false
+        description: Envia a resposta em streaming (NDJSON ou array JSON em chunks).
     responses:
       200:
-        description: Uma lista de livros com avaliação 'Five'.
+        description: Uma lista de livros com rating maior ou igual ao mínimo.
+      400:
+        description: Erro se min_rating ou order forem inválidos.
     """
-    top_books = Book.query.filter_by(rating='Five').all()
-    return jsonify([book.to_dict() for book in top_books])
+    try:
+        min_rating = int(request.args.get('min_rating', 5))
+    except ValueError:
+        abort(400, description="O parâmetro 'min_rating' deve ser um número inteiro de 1 a 5.")
+    if not 1 <= min_rating <= 5:
+        abort(400, description="O parâmetro 'min_rating' deve ser um número inteiro de 1 a 5.")
+    orderings = {
+        'id': None,
+        'rating': [Book.rating_numerico.desc(), Book.id],
+        'preco': [Book.preco, Book.id],
+    }
+    order = request.args.get('order', 'id')
+    if order not in orderings:
+        abort(400, description="O parâmetro 'order' deve ser 'id', 'rating' ou 'preco'.")
+    store = columnar_store()
+    if store is not None:
+        return columnar_list_response(store, store.top_rated(min_rating, order), order_by_id=order == 'id')
+    query = Book.query.filter(Book.rating_numerico >= min_rating)
+    return book_list_response(query, order_by=orderings[order])
 
 @bp.route('/books/price-range', methods=['GET'])
 def get_books_by_price_range():
@@ -134,6 +452,27 @@ def get_books_by_price_range():
         format: float
         required: false
         description: Preço máximo.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de livros retornados (paginação por keyset).
+      - name: after_id
+        in: query
+        type: integer
+        required: false
+        description: Retorna apenas livros com id maior que este (use o cabeçalho X-Next-After-Id da página anterior).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos retornados, separados por vírgula (ex. id,titulo,preco).
+      - name: stream
+        in: query
+        type: string
+        enum: [ndjson, json]
+        required: false
+        description: Envia a resposta em streaming (NDJSON ou array JSON em chunks).
     responses:
       200:
         description: Uma lista de livros dentro da faixa de preço especificada.
@@ -145,54 +484,136 @@ def get_books_by_price_range():
         max_price = float(request.args.get('max', float('inf')))
     except ValueError:
         return jsonify({'error': 'Invalid price format. Please use numbers.'}), 400
+    store = columnar_store()
+    if store is not None:
+        return columnar_list_response(store, store.price_range(min_price, max_price))
     query = Book.query.filter(Book.preco >= min_price).filter(Book.preco <= max_price)
-    results = query.all()
-    return jsonify([book.to_dict() for book in results])
+    return book_list_response(query)
+
+@bp.route('/export', methods=['GET'])
+def export_books():
+    """Exporta os livros em formato colunar (Parquet ou Arrow) ou CSV.
+    Lê o snapshot Parquet gravado ao final da carga; os filtros são aplicados na leitura
+    e a resposta é enviada em streaming, lote a lote.
+    ---
+    tags:
+      - Livros
+    produces:
+      - application/vnd.apache.parquet
+      - application/vnd.apache.arrow.stream
+      - text/csv
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [parquet, arrow, csv]
+        required: false
+        default: parquet
+        description: Formato do arquivo exportado.
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Colunas exportadas, separadas por vírgula (ex. id,titulo,preco).
+      - name: category
+        in: query
+        type: string
+        required: false
+        description: Categoria exata (não diferencia maiúsculas de minúsculas).
+      - name: min_price
+        in: query
+        type: number
+        format: float
+        required: false
+        description: Preço mínimo.
+      - name: max_price
+        in: query
+        type: number
+        format: float
+        required: false
+        description: Preço máximo.
+      - name: min_rating
+        in: query
+        type: integer
+        required: false
+        description: Rating numérico mínimo (1 a 5).
+    responses:
+      200:
+        description: O arquivo com os livros filtrados.
+      400:
+        description: Formato, campos ou filtros inválidos.
+    """
+    export_format = request.args.get('format', 'parquet').lower()
+    if export_format not in EXPORT_FORMATS:
+        abort(400, description=f"Formato inválido. Use {', '.join(EXPORT_FORMATS)}.")
+    return export_response(export_format, parse_fields())
 
 @bp.route('/stats/overview', methods=['GET'])
 def get_stats_overview():
     """Estatísticas gerais da coleção.
+    Servidas a partir do snapshot pré-calculado ao final de cada carga.
     ---
     tags:
       - Estatísticas
     responses:
       200:
-        description: Um resumo com estatísticas gerais da coleção de livros.
+        description: Um resumo com estatísticas gerais da coleção de livros (total, preço médio, mínimo, máximo e mediano, distribuição de ratings).
     """
-    total_livros = Book.query.count()
-    preco_total = db.session.query(db.func.sum(Book.preco)).scalar()
-    preco_medio = round(preco_total / total_livros, 2) if total_livros > 0 else 0
-    ratings_query = db.session.query(Book.rating, db.func.count(Book.rating)).group_by(Book.rating).all()
-    ratings_distribution = {rating: count for rating, count in ratings_query}
-    return jsonify({
-        'total_de_livros': total_livros,
-        'preco_medio': preco_medio,
-        'distribuicao_de_ratings': ratings_distribution
-    })
+    store = columnar_store()
+    dados = store.stats[SNAPSHOT_OVERVIEW] if store is not None else read_snapshot(SNAPSHOT_OVERVIEW)
+    return current_app.response_class(dados, mimetype='application/json')
 
 @bp.route('/stats/categories', methods=['GET'])
 def get_stats_by_category():
     """Estatísticas detalhadas por categoria.
+    Servidas a partir do snapshot pré-calculado ao final de cada carga.
     ---
     tags:
       - Estatísticas
     responses:
       200:
-        description: Um objeto com estatísticas para cada categoria.
+        description: Um objeto com estatísticas para cada categoria (quantidade, preço médio, mínimo, máximo e mediano, distribuição de ratings).
     """
-    stats_query = db.session.query(
-        Book.categoria, 
-        db.func.count(Book.id), 
-        db.func.avg(Book.preco)
-    ).group_by(Book.categoria).all()
-    stats = {
-        categoria: {
-            'quantidade_de_livros': count,
-            'preco_medio': f'{round(avg_price, 2)}'
-        }
-        for categoria, count, avg_price in stats_query
-    }
-    return jsonify(stats)
+    store = columnar_store()
+    dados = store.stats[SNAPSHOT_CATEGORIES] if store is not None else read_snapshot(SNAPSHOT_CATEGORIES)
+    return current_app.response_class(dados, mimetype='application/json')
+
+@bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Contadores do cache de respostas deste processo.
+    Útil para dimensionar RESPONSE_CACHE_SIZE e RESPONSE_CACHE_TTL.
+    ---
+    tags:
+      - Monitoramento
+    responses:
+      200:
+        description: Hits, misses, evictions, tamanho atual e versão do dataset em cache.
+    """
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **cache.stats()})
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas de desempenho deste processo no formato texto do Prometheus.
+    Disponível com METRICS_ENABLED: histogramas por endpoint do tempo total, do tempo em SQL,
+    do tempo de serialização e da quantidade de consultas por requisição.
+    ---
+    tags:
+      - Monitoramento
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Métricas no formato de exposição do Prometheus.
+      404:
+        description: Instrumentação desligada (METRICS_ENABLED).
+    """
+    registry = current_app.extensions.get('metrics')
+    if registry is None:
+        abort(404)
+    return current_app.response_class(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @bp.app_errorhandler(400)
 def bad_request_error(error):
@@ -0,0 +1,37 @@
+import re
+from flask import current_app
+from . import db
+
+book_fts = db.table('book_fts', db.column('rowid'), db.column('rank'))
+
+
+def fts_available():
+    """Indica se o banco tem a tabela full-text book_fts (criada por migrate_database)."""
+    available = current_app.extensions.get('books_fts')
+    if available is None:
+        available = db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_fts'")
+        ).scalar() is not None
+        # Só guarda o resultado positivo: a tabela pode ser criada com a API no ar.
+        if available:
+            current_app.extensions['books_fts'] = True
+    return available
+
+
+def fts_match_expression(text):
+    """
+    Converte o texto digitado em uma expressão MATCH do FTS5: cada palavra vira um
+    termo entre aspas com busca por prefixo, e todos os termos precisam aparecer.
+    Ex.: 'light att' -> '"light"* "att"*'. Retorna '' se não houver palavras.
+    """
+    tokens = re.findall(r'\w+', text.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def title_matches(expression):
+    """Subconsulta (rowid, rank) dos livros cujo título casa com a expressão FTS5."""
+    return (
+        db.select(book_fts.c.rowid, book_fts.c.rank)
+        .where(db.literal_column('book_fts').op('MATCH')(expression))
+        .subquery()
+    )
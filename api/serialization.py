@@ -0,0 +1,82 @@
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela, usa o json da stdlib
+    orjson = None
+
+SERIALIZERS = ('auto', 'orjson', 'stdlib')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Provider padrão do Flask (json da stdlib), com dumps_bytes para as respostas da API."""
+
+    def dumps_bytes(self, obj):
+        return DefaultJSONProvider.dumps(self, obj).encode()
+
+
+def _orjson_dumps(obj, default, option):
+    return orjson.dumps(obj, default=default, option=option)
+
+
+class OrjsonJSONProvider(StdlibJSONProvider):
+    """
+    Serializa com orjson (C). Mantém a ordenação de chaves do Flask; a diferença para a
+    stdlib é que caracteres não ASCII saem em UTF-8 em vez de escapes \\uXXXX.
+    Chamadas com argumentos extras do json da stdlib (ex.: indent) usam a stdlib.
+    """
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return DefaultJSONProvider.dumps(self, obj, **kwargs)
+        return _orjson_dumps(obj, self.default, self.option).decode()
+
+    def dumps_bytes(self, obj):
+        return _orjson_dumps(obj, self.default, self.option)
+
+    def response(self, *args, **kwargs):
+        if self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Escolhe o serializador JSON do app conforme JSON_SERIALIZER ('auto' usa orjson se instalado)."""
+    name = app.config['JSON_SERIALIZER']
+    if name not in SERIALIZERS:
+        raise ValueError(f"JSON_SERIALIZER inválido: {name!r} (use {', '.join(SERIALIZERS)}).")
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_SERIALIZER = 'orjson', mas o pacote orjson não está instalado.")
+    app.json = OrjsonJSONProvider(app) if name == 'orjson' else StdlibJSONProvider(app)
+
+    from .cache import ResponseCache
+    # Corpo JSON já codificado de /books/<id>: o livro só muda quando a versão do dataset muda.
+    app.extensions['book_json_cache'] = ResponseCache(app.config['BOOK_JSON_CACHE_SIZE'], float('inf'))
+
+
+def encoded_book(book_id, load):
+    """
+    Corpo JSON (bytes) do livro `book_id`, ou None se ele não existe. `load(book_id)`
+    retorna o dicionário do livro (ou None); o resultado codificado fica em cache até a
+    versão do dataset mudar.
+    """
+    cache = current_app.extensions['book_json_cache']
+    version = current_app.extensions['dataset_version'].get()
+    versao = version[0] if version is not None else None
+    if versao is not None:
+        entry = cache.get(book_id, versao)
+        if entry is not None:
+            return entry['body']
+    book = load(book_id)
+    if book is None:
+        return None
+    body = current_app.json.dumps_bytes(book) + b'\n'
+    if versao is not None:
+        cache.put(book_id, versao, 200, current_app.json.mimetype, [], body)
+    return body
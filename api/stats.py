@@ -0,0 +1,93 @@
+import json
+import math
+import statistics
+from datetime import datetime, timezone
+from . import db
+
+SNAPSHOT_OVERVIEW = 'overview'
+SNAPSHOT_CATEGORIES = 'categories'
+
+
+def _price_summary(prices):
+    """Resumo de uma lista de preços já ordenada."""
+    return {
+        'preco_minimo': prices[0],
+        'preco_maximo': prices[-1],
+        'preco_mediano': round(statistics.median(prices), 2),
+    }
+
+
+def compute_stats(rows):
+    """
+    Calcula, em uma única passada sobre (categoria, preco, rating), as estatísticas
+    gerais e por categoria servidas pelos endpoints /stats.
+    Retorna (overview, categories) no formato JSON das respostas.
+    """
+    precos = []
+    ratings = {}
+    por_categoria = {}
+    for categoria, preco, rating in rows:
+        precos.append(preco)
+        grupo = por_categoria.setdefault(categoria, {'precos': [], 'ratings': {}})
+        grupo['precos'].append(preco)
+        if rating is not None:
+            ratings[rating] = ratings.get(rating, 0) + 1
+            grupo['ratings'][rating] = grupo['ratings'].get(rating, 0) + 1
+
+    total = len(precos)
+    overview = {
+        'total_de_livros': total,
+        'preco_medio': round(math.fsum(precos) / total, 2) if total > 0 else 0,
+        'distribuicao_de_ratings': ratings,
+        'total_de_categorias': len(por_categoria),
+    }
+    if precos:
+        overview.update(_price_summary(sorted(precos)))
+
+    categories = {}
+    for categoria, grupo in por_categoria.items():
+        precos_categoria = sorted(grupo['precos'])
+        categories[categoria] = {
+            'quantidade_de_livros': len(precos_categoria),
+            'preco_medio': f'{round(math.fsum(precos_categoria) / len(precos_categoria), 2)}',
+            'distribuicao_de_ratings': grupo['ratings'],
+            **_price_summary(precos_categoria),
+        }
+    return overview, categories
+
+
+def _dumps(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'))
+
+
+def rebuild_stats(conn):
+    """
+    Recalcula o snapshot de estatísticas (tabela stats_snapshot) usando a conexão
+    informada, normalmente dentro da mesma transação da carga dos livros.
+    """
+    rows = conn.exec_driver_sql('SELECT categoria, preco, rating FROM book')
+    overview, categories = compute_stats(rows)
+    gerado_em = datetime.now(timezone.utc).replace(tzinfo=None)
+    conn.exec_driver_sql('DELETE FROM stats_snapshot')
+    conn.execute(
+        db.text('INSERT INTO stats_snapshot (nome, dados, gerado_em) VALUES (:nome, :dados, :gerado_em)'),
+        [
+            {'nome': SNAPSHOT_OVERVIEW, 'dados': _dumps(overview), 'gerado_em': gerado_em},
+            {'nome': SNAPSHOT_CATEGORIES, 'dados': _dumps(categories), 'gerado_em': gerado_em},
+        ]
+    )
+
+
+def read_snapshot(nome):
+    """
+    Retorna o JSON (texto) do snapshot pedido. Se o snapshot ainda não foi gerado,
+    calcula as estatísticas na hora a partir da tabela book.
+    """
+    from .models import StatsSnapshot
+
+    snapshot = db.session.get(StatsSnapshot, nome)
+    if snapshot is not None:
+        return snapshot.dados
+    rows = db.session.connection().exec_driver_sql('SELECT categoria, preco, rating FROM book')
+    overview, categories = compute_stats(rows)
+    return _dumps(overview if nome == SNAPSHOT_OVERVIEW else categories)
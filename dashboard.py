@@ -1,25 +1,108 @@
+import json
+import math
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from api import create_app
+from api.models import Book, RATING_VALUES
+from api.pagination import BOOK_FIELDS
+from api.aggregates import book_filters, summary, price_histogram, category_counts, book_page
+from api.stats import read_snapshot, SNAPSHOT_OVERVIEW, SNAPSHOT_CATEGORIES
 
 st.set_page_config(layout="wide")
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/books_data.csv")
-    if 'disponibilidade' in df.columns:
-        df = df.drop(columns=['disponibilidade'])
-    df['id'] = df.index
-    return df
-
-df = load_data()
+# Livros por página nas tabelas: o dashboard nunca carrega o catálogo inteiro.
+PAGE_SIZE = 50
+
+@st.cache_resource
+def get_app():
+    # Mesmo app (e banco) da API; o dashboard apenas lê.
+    return create_app({'HTTP_CACHE_ENABLED': False, 'API_DOCS': 'off'})
+
+def run_query(fn, *args, **kwargs):
+    with get_app().app_context():
+        return fn(*args, **kwargs)
+
+def dataset_version():
+    version = run_query(lambda: get_app().extensions['dataset_version'].get())
+    return version[0] if version is not None else None
+
+# As consultas abaixo recebem a versão do dataset como primeiro argumento: ela faz parte
+# da chave do cache, então uma nova carga do banco invalida os resultados anteriores.
+@st.cache_data(max_entries=32)
+def load_snapshot(versao, nome):
+    return json.loads(run_query(read_snapshot, nome))
+
+# Sem filtros, os números vêm dos snapshots de estatísticas gravados ao final da carga.
+def load_domain(versao):
+    """Valores possíveis dos filtros: categorias, ratings e preço mínimo e máximo."""
+    overview = load_snapshot(versao, SNAPSHOT_OVERVIEW)
+    return {
+        'categorias': sorted(load_snapshot(versao, SNAPSHOT_CATEGORIES)),
+        'ratings': sorted(overview['distribuicao_de_ratings'], key=lambda rating: -RATING_VALUES.get(rating, 0)),
+        'preco_min': overview.get('preco_minimo', 0),
+        'preco_max': overview.get('preco_maximo', 0),
+    }
+
+@st.cache_data(max_entries=256)
+def load_summary(versao, filtros):
+    if not any(filtros.values()):
+        overview = load_snapshot(versao, SNAPSHOT_OVERVIEW)
+        return {'total': overview['total_de_livros'], 'preco_medio': overview['preco_medio'],
+                'categorias': overview['total_de_categorias']}
+    return run_query(lambda: summary(book_filters(**filtros)))
+
+@st.cache_data(max_entries=256)
+def load_histogram(versao, filtros, bins=50):
+    return run_query(lambda: price_histogram(book_filters(**filtros), bins))
+
+@st.cache_data(max_entries=256)
+def load_top_categories(versao, filtros, limit=10):
+    if not any(filtros.values()):
+        categories = load_snapshot(versao, SNAPSHOT_CATEGORIES)
+        contagens = sorted(((nome, dados['quantidade_de_livros']) for nome, dados in categories.items()),
+                           key=lambda item: (-item[1], item[0]))
+        return contagens[:limit]
+    return run_query(lambda: category_counts(book_filters(**filtros), limit))
+
+@st.cache_data(max_entries=256)
+def load_page(versao, filtros, page):
+    return run_query(lambda: book_page(book_filters(**filtros), page, PAGE_SIZE))
+
+@st.cache_data(max_entries=256)
+def load_book(versao, book_id):
+    rows = run_query(lambda: book_page([Book.id == book_id], 1, 1))
+    return rows[0] if rows else None
+
+def make_filters(categorias=(), ratings=(), faixa_preco=None, title=''):
+    """Filtros da seleção em forma hashável (chave do cache); a faixa completa não filtra."""
+    min_price = max_price = None
+    if faixa_preco is not None:
+        if faixa_preco[0] > preco_min:
+            min_price = faixa_preco[0]
+        if faixa_preco[1] < preco_max:
+            max_price = faixa_preco[1]
+    return {'categorias': tuple(categorias), 'ratings': tuple(ratings),
+            'min_price': min_price, 'max_price': max_price, 'title': title}
+
+def show_table(key, filtros):
+    """Tabela paginada dos livros da seleção."""
+    total = load_summary(versao, filtros)['total']
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    page = st.number_input("Página", min_value=1, max_value=pages, step=1, value=1, key=f'{key}_pagina')
+    st.caption(f"Página {page} de {pages} ({total} livros)")
+    st.dataframe(pd.DataFrame(load_page(versao, filtros, page), columns=BOOK_FIELDS),
+                 use_container_width=True, hide_index=True)
+
+versao = dataset_version()
+domain = load_domain(versao)
+categorias = domain['categorias']
+preco_min = int(domain['preco_min'])
+preco_max = math.ceil(domain['preco_max'])
 
 st.sidebar.header("Filtros Visuais")
-categorias = df['categoria'].unique()
-categorias_selecionadas = st.sidebar.multiselect("Categoria", sorted(categorias))
+categorias_selecionadas = st.sidebar.multiselect("Categoria", categorias)
 
-preco_min = int(df['preco'].min())
-preco_max = int(df['preco'].max())
 faixa_preco_selecionada = st.sidebar.slider(
     "Faixa de Preço (£)",
     preco_min,
@@ -27,38 +110,34 @@ faixa_preco_selecionada = st.sidebar.slider(
     (preco_min, preco_max)
 )
 
-ratings = sorted(df['rating'].unique(), reverse=True)
-ratings_selecionados = st.sidebar.multiselect("Avaliação (Rating)", ratings)
+ratings_selecionados = st.sidebar.multiselect("Avaliação (Rating)", domain['ratings'])
 
-df_filtrado_visual = df.copy()
-if categorias_selecionadas:
-    df_filtrado_visual = df_filtrado_visual[df_filtrado_visual['categoria'].isin(categorias_selecionadas)]
-if ratings_selecionados:
-    df_filtrado_visual = df_filtrado_visual[df_filtrado_visual['rating'].isin(ratings_selecionados)]
-df_filtrado_visual = df_filtrado_visual[
-    (df_filtrado_visual['preco'] >= faixa_preco_selecionada[0]) & (df_filtrado_visual['preco'] <= faixa_preco_selecionada[1])
-]
+filtros_visuais = make_filters(categorias_selecionadas, ratings_selecionados, faixa_preco_selecionada)
 
 st.title("Dashboard de Análise de Livros")
 st.markdown("Use os filtros na barra lateral para explorar visualmente o catálogo.")
 
-total_livros, preco_medio, num_categorias_unicas = len(df_filtrado_visual), df_filtrado_visual['preco'].mean() if len(df_filtrado_visual) > 0 else 0, df_filtrado_visual['categoria'].nunique()
+resumo = load_summary(versao, filtros_visuais)
 col1, col2, col3 = st.columns(3)
-col1.metric("Total de Livros (na seleção)", f"{total_livros}")
-col2.metric("Preço Médio (na seleção)", f"£ {preco_medio:.2f}")
-col3.metric("Categorias (na seleção)", f"{num_categorias_unicas}")
+col1.metric("Total de Livros (na seleção)", f"{resumo['total']}")
+col2.metric("Preço Médio (na seleção)", f"£ {resumo['preco_medio']:.2f}")
+col3.metric("Categorias (na seleção)", f"{resumo['categorias']}")
 
 st.markdown("---")
 
 col_graf1, col_graf2 = st.columns(2)
 with col_graf1:
     st.subheader("Distribuição de Preços")
-    fig_preco = px.histogram(df_filtrado_visual, x="preco", nbins=50)
+    histograma = pd.DataFrame(load_histogram(versao, filtros_visuais), columns=['inicio', 'fim', 'quantidade'])
+    fig_preco = px.bar(histograma, x='inicio', y='quantidade', labels={'inicio': 'preco', 'quantidade': 'count'})
+    fig_preco.update_traces(offset=0, width=(histograma['fim'] - histograma['inicio']).tolist())
+    fig_preco.update_layout(bargap=0)
     st.plotly_chart(fig_preco, use_container_width=True)
 with col_graf2:
     st.subheader("Top 10 Categorias com Mais Livros")
-    top_10_categorias = df_filtrado_visual['categoria'].value_counts().nlargest(10)
-    fig_categorias = px.bar(top_10_categorias, x=top_10_categorias.values, y=top_10_categorias.index, orientation='h', labels={'x': 'Qtde. Livros', 'y': 'Categoria'})
+    top_10_categorias = pd.DataFrame(load_top_categories(versao, filtros_visuais), columns=['categoria', 'quantidade'])
+    fig_categorias = px.bar(top_10_categorias, x='quantidade', y='categoria', orientation='h', labels={'quantidade': 'Qtde. Livros', 'categoria': 'Categoria'})
+    fig_categorias.update_layout(yaxis={'categoryorder': 'total ascending'})
     st.plotly_chart(fig_categorias, use_container_width=True)
 
 st.markdown("---")
@@ -66,60 +145,54 @@ st.markdown("---")
 st.title("🔎 Explorador de Funcionalidades")
 st.markdown("Interaja com os dados como se estivesse usando os endpoints da API.")
 
+# Os botões só escolhem a listagem; ela fica na sessão para a paginação funcionar entre reruns.
 with st.expander("Listar Livros (GET /books, GET /books/top-rated)"):
     if st.button("Listar TODOS os Livros"):
-        st.dataframe(df, use_container_width=True)
+        st.session_state['listagem'] = 'todos'
 
     if st.button("Listar Livros com 5 Estrelas (Top Rated)"):
-        top_rated_df = df[df['rating'] == 'Five']
-        st.dataframe(top_rated_df, use_container_width=True)
+        st.session_state['listagem'] = 'top_rated'
+
+    if st.session_state.get('listagem') == 'todos':
+        show_table('todos', make_filters())
+    elif st.session_state.get('listagem') == 'top_rated':
+        show_table('top_rated', make_filters(ratings=['Five']))
 
 with st.expander("Buscar Livro por ID (GET /books/{id})"):
-    book_id_input = st.number_input("Digite o ID do Livro", min_value=0, max_value=len(df)-1, step=1, value=0)
+    book_id_input = st.number_input("Digite o ID do Livro", min_value=1, step=1, value=1)
     if st.button("Buscar por ID"):
-        result_df = df[df['id'] == book_id_input]
-        if not result_df.empty:
-            st.json(result_df.to_dict(orient='records')[0])
+        book = load_book(versao, int(book_id_input))
+        if book is not None:
+            st.json(book)
         else:
             st.error("Livro com este ID não encontrado.")
 
 with st.expander("Busca Avançada (GET /search, GET /price-range)"):
     st.subheader("Busca por Título e Categoria")
     search_title = st.text_input("Título contém...")
-    search_category = st.selectbox("Categoria é...", options=["Qualquer"] + sorted(categorias))
-    
+    search_category = st.selectbox("Categoria é...", options=["Qualquer"] + categorias)
+
     st.subheader("Busca por Faixa de Preço")
     search_min_price, search_max_price = st.slider("Preço entre...", preco_min, preco_max, (preco_min, preco_max))
-    
+
     if st.button("Executar Busca Avançada"):
-        df_busca = df.copy()
-        if search_title:
-            df_busca = df_busca[df_busca['titulo'].str.contains(search_title, case=False, na=False)]
-        if search_category != "Qualquer":
-            df_busca = df_busca[df_busca['categoria'] == search_category]
-        
-        df_busca = df_busca[
-            (df_busca['preco'] >= search_min_price) & (df_busca['preco'] <= search_max_price)
-        ]
-        
-        st.write(f"Encontrados {len(df_busca)} livros.")
-        st.dataframe(df_busca, use_container_width=True)
+        st.session_state['busca'] = make_filters(
+            [] if search_category == "Qualquer" else [search_category], (),
+            (search_min_price, search_max_price), search_title.strip()
+        )
+
+    if 'busca' in st.session_state:
+        filtros_busca = st.session_state['busca']
+        st.write(f"Encontrados {load_summary(versao, filtros_busca)['total']} livros.")
+        show_table('busca', filtros_busca)
 
 with st.expander("Listar Categorias (GET /categories)"):
     if st.button("Ver todas as categorias únicas"):
-        st.json({"categorias": sorted(categorias)})
+        st.json({"categorias": categorias})
 
 with st.expander("Estatísticas e Saúde (GET /stats)"):
     if st.button("Ver Estatísticas Gerais (Overview)"):
-        stats_overview = {
-            'total_de_livros': len(df),
-            'preco_medio': df['preco'].mean(),
-            'distribuicao_de_ratings': df['rating'].value_counts().to_dict()
-        }
-        st.json(stats_overview)
+        st.json(load_snapshot(versao, SNAPSHOT_OVERVIEW))
 
     if st.button("Ver Estatísticas por Categoria"):
-        stats_by_category = df.groupby('categoria')['preco'].agg(['count', 'mean']).rename(
-            columns={'count': 'quantidade_de_livros', 'mean': 'preco_medio'}
-        ).to_dict('index')
-        st.json(stats_by_category)
\ No newline at end of file
+        st.json(load_snapshot(versao, SNAPSHOT_CATEGORIES))
@@ -0,0 +1,46 @@
+import os
+import multiprocessing
+
+# Configuração de produção do gunicorn. Lida automaticamente quando o gunicorn é
+# iniciado na raiz do projeto:
+#     gunicorn
+# Os valores podem ser ajustados por variáveis de ambiente (WEB_WORKERS, WEB_THREADS...).
+
+# Aplicação: wsgi.py cria o app uma vez no master (preload_app).
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:' + os.environ.get('PORT', '8000'))
+
+# Um worker por CPU (a serialização JSON disputa o GIL dentro de cada processo) e
+# algumas threads por worker para sobrepor a espera de I/O e do SQLite. O pool de
+# conexões de cada worker tem WEB_THREADS conexões (ver api/config.py).
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', '4'))
+worker_class = 'gthread'
+
+# Carrega a aplicação no master antes do fork: os workers compartilham as páginas do
+# código importado (copy-on-write) e sobem mais rápido.
+preload_app = True
+
+# Respostas completas de catálogos grandes (/books sem limit) podem levar segundos.
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+# Recicla os workers periodicamente para limitar o crescimento de memória.
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# A API só lê o banco: abre o SQLite com mode=ro (a carga roda fora do servidor).
+raw_env = ['DATABASE_READ_ONLY=' + os.environ.get('DATABASE_READ_ONLY', '1')]
+
+
+def post_fork(server, worker):
+    # Conexões eventualmente abertas no master (preload_app) não podem ser usadas por
+    # mais de um processo: cada worker começa com um pool vazio.
+    from api import db
+
+    with worker.app.wsgi().app_context():
+        db.engine.dispose(close=False)
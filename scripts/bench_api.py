@@ -0,0 +1,511 @@
+import sys
+import os
+import json
+import time
+import random
+import socket
+import resource
+import platform
+import threading
+import statistics
+import subprocess
+import argparse
+import tempfile
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.synthetic_catalog import build_catalog, parse_size, size_label, CATEGORIES
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BENCH_DIR = os.path.join(PROJECT_ROOT, 'data', 'benchmarks')
+MODES = ('client', 'gunicorn')
+BATCH_SIZE = 100
+COVER_SIZES = ('small', 'medium', 'original')
+TITLE_TERMS = ['story', 'light', 'dark night', 'secret garden', 'golden empire', 'heart of']
+
+
+def endpoint_urls(total_books, seed=42):
+    """
+    URLs medidas por endpoint. Cada endpoint tem uma lista de requisições que é percorrida
+    em ciclo (ids e termos variados, para não medir sempre a mesma linha). Uma requisição
+    é uma URL (GET), um dict {'method', 'url', 'json'} ou uma lista de requisições feitas
+    em sequência e medidas como uma única amostra.
+    """
+    rng = random.Random(seed)
+    ids = [rng.randint(1, max(total_books, 1)) for _ in range(50)]
+    batch_ids = [rng.randint(1, max(total_books, 1)) for _ in range(BATCH_SIZE)]
+    categories = [rng.choice(CATEGORIES) for _ in range(10)]
+    return {
+        'health': ['/api/v1/health'],
+        'books': ['/api/v1/books'],
+        'books_page': [f'/api/v1/books?limit=100&after_id={book_id}' for book_id in ids],
+        'books_stream': ['/api/v1/books?stream=ndjson&fields=id,titulo,preco'],
+        'book_by_id': [f'/api/v1/books/{book_id}' for book_id in ids],
+        # Capas baixadas por prepare_covers, alternando miniaturas e original.
+        'book_cover': [f'/api/v1/books/{book_id}/cover?size={COVER_SIZES[i % len(COVER_SIZES)]}'
+                       for i, book_id in enumerate(ids)],
+        # Mesmos BATCH_SIZE livros: uma requisição por id vs. uma única requisição em lote.
+        f'book_by_id_x{BATCH_SIZE}': [[f'/api/v1/books/{book_id}' for book_id in batch_ids]],
+        f'books_batch_get_{BATCH_SIZE}': [f"/api/v1/books/batch?ids={','.join(map(str, batch_ids))}"],
+        f'books_batch_post_{BATCH_SIZE}': [{'method': 'POST', 'url': '/api/v1/books/batch', 'json': {'ids': batch_ids}}],
+        'categories': ['/api/v1/categories'],
+        'search_title': [f'/api/v1/books/search?title={term}' for term in TITLE_TERMS],
+        'search_category': [f'/api/v1/books/search?category={name}' for name in categories],
+        'top_rated': ['/api/v1/books/top-rated'],
+        'top_rated_page': ['/api/v1/books/top-rated?min_rating=4&order=rating&limit=100'],
+        'price_range': ['/api/v1/books/price-range?min=20&max=25'],
+        'price_range_page': ['/api/v1/books/price-range?min=20&max=25&limit=100'],
+        'facets': ['/api/v1/books/facets'],
+        'facets_filtered': [f'/api/v1/books/facets?category={name}&min_rating=3&min_price=20&max_price=40'
+                            for name in categories],
+        # O que uma interface de filtros fazia antes de /books/facets: uma requisição por informação.
+        'facets_separate_calls': [['/api/v1/categories', f'/api/v1/books/search?category={name}&limit=20',
+                                   '/api/v1/books/price-range?min=20&max=40&limit=20', '/api/v1/stats/categories']
+                                  for name in categories],
+        'export_parquet': ['/api/v1/export'],
+        'export_arrow_filtered': [f'/api/v1/export?format=arrow&fields=id,titulo,preco&category={name}&min_rating=3'
+                                  for name in categories],
+        'export_csv': ['/api/v1/export?format=csv'],
+        'stats_overview': ['/api/v1/stats/overview'],
+        'stats_categories': ['/api/v1/stats/categories'],
+        'cache_stats': ['/api/v1/cache/stats'],
+        'metrics': ['/api/v1/metrics'],
+    }
+
+
+def _flatten(specs):
+    for spec in specs:
+        if isinstance(spec, list):
+            yield from _flatten(spec)
+        elif isinstance(spec, dict):
+            yield spec['method'], spec['url']
+        else:
+            yield 'GET', spec
+
+
+def _routes_hit(app, endpoints):
+    """Endpoints do Flask atingidos pelas URLs do benchmark."""
+    adapter = app.url_map.bind('localhost')
+    return {
+        adapter.match(url.split('?')[0], method=method)[0]
+        for specs in endpoints.values() for method, url in _flatten(specs)
+    }
+
+
+def uncovered_routes(app, endpoints):
+    """Endpoints do blueprint 'api' que nenhuma URL do benchmark atinge."""
+    registered = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.startswith('api.')}
+    return sorted(registered - _routes_hit(app, endpoints))
+
+
+def routes_without_metrics(app, endpoints):
+    """
+    Endpoints medidos sem nenhuma amostra no histograma de duração (METRICS_ENABLED). A
+    duração é registrada quando a resposta é fechada, então um driver que não fecha as
+    respostas deixa os histogramas vazios.
+    """
+    registry = app.extensions['metrics']
+    with registry.duration.lock:
+        registrados = {labels[0] for labels in registry.duration.series}
+    return sorted(_routes_hit(app, endpoints) - registrados)
+
+
+def latency_summary(samples):
+    """p50/p95/p99 (ms) de uma lista de durações em segundos."""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {'p50_ms': value, 'p95_ms': value, 'p99_ms': value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50_ms': cuts[49] * 1000, 'p95_ms': cuts[94] * 1000, 'p99_ms': cuts[98] * 1000}
+
+
+def _rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as stat:
+                    if int(stat.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return children
+
+
+class RssSampler:
+    """
+    Amostra em segundo plano a memória residente (soma do processo e dos filhos, ex.:
+    workers do gunicorn) e guarda o pico. Sem /proc, usa ru_maxrss do próprio processo.
+    """
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        if not os.path.isdir('/proc'):
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return sum(_rss_kb(pid) for pid in [self.pid] + _children(self.pid))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, self._sample())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_kb = self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, self._sample())
+
+
+class ClientDriver:
+    """Requisições pelo test client do Flask, no próprio processo (sem rede nem WSGI server)."""
+
+    concurrency = 1
+
+    def __init__(self, config):
+        from api import create_app
+
+        self.app = create_app(config)
+        self.client = self.app.test_client()
+        self.pid = os.getpid()
+
+    def request(self, method, url, json=None):
+        # Fechar a resposta dispara os call_on_close (métricas e profiler, ver api/metrics.py).
+        with self.client.open(url, method=method, json=json) as response:
+            response.get_data()
+            return response.status_code
+
+    def close(self):
+        pass
+
+
+class GunicornDriver:
+    """
+    Sobe o gunicorn local com create_app(config) e faz as requisições por HTTP. Usa o
+    gunicorn.conf.py do projeto (perfil de produção), com workers e threads do benchmark.
+    """
+
+    def __init__(self, config, workers=2, threads=4, concurrency=8, startup_timeout=60):
+        import requests
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{port}'
+        self.concurrency = concurrency
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+             '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', '--access-logfile', os.devnull,
+             f'api:create_app({config!r})'],
+            cwd=PROJECT_ROOT,
+        )
+        self.pid = self.process.pid
+        self._local = threading.local()
+        self._requests = requests
+
+        limite = time.monotonic() + startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn terminou ao iniciar (código {self.process.returncode}).')
+            try:
+                if requests.get(self.base_url + '/api/v1/health', timeout=5).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                pass
+            if time.monotonic() > limite:
+                self.close()
+                raise RuntimeError('gunicorn não respondeu a tempo.')
+            time.sleep(0.2)
+
+    def request(self, method, url, json=None):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        response = session.request(method, self.base_url + url, json=json, timeout=300)
+        return response.status_code
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def _perform(driver, spec):
+    """Executa uma requisição (ou uma sequência delas) e retorna o pior status."""
+    if isinstance(spec, list):
+        return max(_perform(driver, item) for item in spec)
+    if isinstance(spec, dict):
+        return driver.request(spec['method'], spec['url'], spec.get('json'))
+    return driver.request('GET', spec)
+
+
+def measure_endpoint(driver, urls, requests_per_endpoint, max_seconds, warmup=3):
+    """
+    Mede um endpoint: `warmup` requisições descartadas e depois até
+    `requests_per_endpoint` requisições (ou `max_seconds`), com a concorrência do driver.
+    """
+    for i in range(warmup):
+        _perform(driver, urls[i % len(urls)])
+
+    samples = []
+    erros = 0
+    lock = threading.Lock()
+    counter = iter(range(requests_per_endpoint))
+    limite = time.monotonic() + max_seconds
+
+    def worker():
+        nonlocal erros
+        while time.monotonic() < limite:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            inicio = time.perf_counter()
+            status = _perform(driver, urls[i % len(urls)])
+            duracao = time.perf_counter() - inicio
+            with lock:
+                samples.append(duracao)
+                if status != 200:
+                    erros += 1
+
+    with RssSampler(driver.pid) as rss:
+        inicio = time.perf_counter()
+        if driver.concurrency == 1:
+            worker()
+        else:
+            with ThreadPoolExecutor(max_workers=driver.concurrency) as executor:
+                for future in [executor.submit(worker) for _ in range(driver.concurrency)]:
+                    future.result()
+        total = time.perf_counter() - inicio
+
+    return {
+        'url': urls[0] if isinstance(urls[0], str) else f'{len(list(_flatten(urls[:1])))} requisições',
+        'requisicoes': len(samples),
+        'erros': erros,
+        'throughput_rps': len(samples) / total if total > 0 else 0.0,
+        **latency_summary(samples),
+        'rss_pico_mb': round(rss.peak_kb / 1024, 1),
+    }
+
+
+def catalog_path(books, directory=BENCH_DIR, seed=42):
+    """Caminho do catálogo sintético de `books` livros, gerado na primeira vez."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'catalog_{size_label(books)}_{seed}.db')
+    if not os.path.exists(path):
+        print(f'Gerando catálogo sintético com {books} livros em {path}...')
+        stats = build_catalog(path, books, seed)
+        print(f"  {stats['inseridos']} livros em {stats['segundos']}s.")
+    return path
+
+
+def cover_ids(urls):
+    """Ids dos livros cujas capas o cenário book_cover pede."""
+    return sorted({int(url.split('/')[4]) for url in urls})
+
+
+def prepare_covers(db_path, ids, images_dir):
+    """
+    Baixa para images_dir as capas dos livros `ids` que ainda não estão no banco, como uma
+    carga com --images: as capas JPEG são geradas num mirror local (ver scripts/local_mirror.py)
+    e baixadas com cache_covers, que grava os originais, as miniaturas e a tabela book_image.
+    """
+    from api import create_app, db
+    from api.models import Book, BookImage
+    from scripts.image_cache import cache_covers
+    from scripts.local_mirror import _write_cover, serve_mirror
+    from scripts.scraper import Fetcher
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(db_path)})
+    with app.app_context():
+        db.create_all()
+        pendentes = db.session.execute(
+            db.select(Book.imagem_url, Book.titulo)
+            .outerjoin(BookImage, BookImage.imagem_url == Book.imagem_url)
+            .where(Book.id.in_(ids), BookImage.imagem_url.is_(None))
+        ).all()
+        if not pendentes:
+            return
+        mirror = tempfile.mkdtemp(prefix='bench_covers_')
+        for url, titulo in pendentes:
+            _write_cover(os.path.join(mirror, url.split('/', 3)[3]), titulo)
+        server, base_url = serve_mirror(mirror)
+        try:
+            stats = cache_covers(Fetcher(rate=0), images_dir, app.config['COVER_SIZES'],
+                                 urls=[url for url, _ in pendentes], base_url=base_url)
+        finally:
+            server.shutdown()
+        print(f"  {stats['baixadas']} capas baixadas do mirror local para {images_dir}.")
+
+
+def run_benchmark(db_path, books, mode, requests_per_endpoint=50, max_seconds=30.0, only=None,
+                  workers=2, threads=4, concurrency=8, backend='sql', http_cache=False, metrics=False):
+    """Roda todos os endpoints em um modo ('client' ou 'gunicorn') e retorna o dicionário de resultados."""
+    config = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(db_path),
+        'BOOKS_BACKEND': backend,
+        'HTTP_CACHE_ENABLED': http_cache,
+        'METRICS_ENABLED': metrics,
+        'IMAGES_DIR': os.path.join(BENCH_DIR, 'images'),
+    }
+    endpoints = endpoint_urls(books)
+    if not metrics:
+        del endpoints['metrics']
+    if only:
+        endpoints = {name: urls for name, urls in endpoints.items() if name in only}
+    if 'book_cover' in endpoints:
+        prepare_covers(db_path, cover_ids(endpoints['book_cover']), config['IMAGES_DIR'])
+
+    if mode == 'client':
+        driver = ClientDriver(config)
+        faltando = uncovered_routes(driver.app, endpoint_urls(books))
+        if faltando:
+            print(f"Aviso: rotas sem benchmark: {', '.join(faltando)}")
+    else:
+        driver = GunicornDriver(config, workers=workers, threads=threads, concurrency=concurrency)
+
+    resultados = {}
+    try:
+        for name, urls in endpoints.items():
+            resultados[name] = measure_endpoint(driver, urls, requests_per_endpoint, max_seconds)
+            r = resultados[name]
+            print(f"  {name:<22} {r['requisicoes']:>6} req {r['throughput_rps']:>9.1f} req/s "
+                  f"p50 {r['p50_ms']:>8.2f} p95 {r['p95_ms']:>8.2f} p99 {r['p99_ms']:>8.2f} ms "
+                  f"RSS {r['rss_pico_mb']:>7.1f} MB" + (f"  ERROS {r['erros']}" if r['erros'] else ''))
+        sem_metricas = routes_without_metrics(driver.app, endpoints) if mode == 'client' and metrics else []
+        if sem_metricas:
+            print(f"ERRO: rotas sem amostras nas métricas: {', '.join(sem_metricas)}")
+    finally:
+        driver.close()
+
+    return {
+        'gerado_em': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'modo': mode,
+        'livros': books,
+        'backend': backend,
+        'http_cache': http_cache,
+        'metrics': metrics,
+        'concorrencia': 1 if mode == 'client' else concurrency,
+        'gunicorn': {'workers': workers, 'threads': threads} if mode == 'gunicorn' else None,
+        'python': platform.python_version(),
+        'endpoints': resultados,
+        'rotas_sem_metricas': sem_metricas,
+    }
+
+
+def find_regressions(results, baseline, tolerance=0.2, min_delta_ms=1.0):
+    """
+    Compara com um resultado anterior do mesmo modo e tamanho. Regressão é p95 acima de
+    (1 + tolerance) vezes o baseline, ou throughput abaixo do baseline / (1 + tolerance).
+    Diferenças de p95 menores que min_delta_ms são ignoradas (ruído em endpoints de
+    poucos milissegundos); o throughput só é comparado acima dessa mesma escala.
+    """
+    regressoes = []
+    for name, atual in results['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(name)
+        if base is None:
+            continue
+        mais_lento = atual['p95_ms'] - base['p95_ms'] >= min_delta_ms
+        if mais_lento and atual['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressoes.append(f"{name}: p95 {atual['p95_ms']:.2f} ms (baseline {base['p95_ms']:.2f} ms)")
+        if mais_lento and atual['throughput_rps'] < base['throughput_rps'] / (1 + tolerance):
+            regressoes.append(f"{name}: throughput {atual['throughput_rps']:.1f} req/s "
+                              f"(baseline {base['throughput_rps']:.1f} req/s)")
+        if atual['erros'] > base['erros']:
+            regressoes.append(f"{name}: {atual['erros']} erros (baseline {base['erros']})")
+    return regressoes
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark de todos os endpoints /api/v1: throughput, latência p50/p95/p99 e pico de RSS.')
+    parser.add_argument('--books', type=parse_size, nargs='+', default=[1_000, 100_000],
+                        help='Tamanhos de catálogo (ex.: 1k 100k 1m).')
+    parser.add_argument('--db', default=None, help='Usa este banco em vez do catálogo sintético (um único tamanho).')
+    parser.add_argument('--mode', choices=MODES, nargs='+', default=list(MODES))
+    parser.add_argument('--requests', type=int, default=50, help='Requisições por endpoint.')
+    parser.add_argument('--max-seconds', type=float, default=30.0, help='Tempo máximo por endpoint.')
+    parser.add_argument('--only', nargs='+', default=None, help='Mede apenas estes endpoints (nomes do relatório).')
+    parser.add_argument('--backend', choices=('sql', 'columnar'), default='sql')
+    parser.add_argument('--http-cache', action='store_true', help='Mede com o cache de respostas ligado.')
+    parser.add_argument('--metrics', action='store_true', help='Mede com a instrumentação (METRICS_ENABLED) ligada.')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=8, help='Clientes simultâneos no modo gunicorn.')
+    parser.add_argument('--output-dir', default=os.path.join(BENCH_DIR, 'results'))
+    parser.add_argument('--baseline-dir', default=os.path.join(BENCH_DIR, 'baseline'))
+    parser.add_argument('--save-baseline', action='store_true', help='Grava os resultados como novo baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Piora tolerada antes de acusar regressão.')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Piora mínima de p95 (ms) considerada.')
+    args = parser.parse_args()
+
+    houve_regressao = False
+    for books in args.books:
+        db_path = args.db or catalog_path(books)
+        if args.db:
+            from api import create_app, db
+            from api.models import Book
+
+            app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(args.db)})
+            with app.app_context():
+                books = db.session.query(Book).count()
+        for mode in args.mode:
+            print(f'\n[{mode}] {books} livros ({db_path})')
+            results = run_benchmark(
+                db_path, books, mode, args.requests, args.max_seconds, args.only,
+                workers=args.workers, threads=args.threads, concurrency=args.concurrency,
+                backend=args.backend, http_cache=args.http_cache, metrics=args.metrics,
+            )
+            nome = f'{mode}-{size_label(books)}-{args.backend}{"-cache" if args.http_cache else ""}{"-metrics" if args.metrics else ""}'
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            output = os.path.join(args.output_dir, f'{nome}-{stamp}.json')
+            _write_json(output, results)
+            print(f'Resultados em {output}')
+            houve_regressao = houve_regressao or bool(results['rotas_sem_metricas'])
+
+            baseline_path = os.path.join(args.baseline_dir, f'{nome}.json')
+            if args.save_baseline:
+                _write_json(baseline_path, results)
+                print(f'Baseline gravado em {baseline_path}')
+            elif os.path.exists(baseline_path):
+                with open(baseline_path, encoding='utf-8') as f:
+                    regressoes = find_regressions(results, json.load(f), args.tolerance, args.min_delta_ms)
+                for regressao in regressoes:
+                    print(f'REGRESSÃO {regressao}')
+                houve_regressao = houve_regressao or bool(regressoes)
+                if not regressoes:
+                    print(f'Sem regressões em relação a {baseline_path}.')
+        if args.db:
+            break
+
+    sys.exit(1 if houve_regressao else 0)
@@ -0,0 +1,179 @@
+import sys
+import os
+import json
+import time
+import statistics
+import argparse
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import scraper
+
+FIXTURES_DIR = 'data/benchmarks/html'
+PARSE_FUNCTIONS = {
+    'listing': scraper.parse_listing_page,
+    'detail': scraper.parse_book_category,
+    'index': scraper.parse_category_index,
+}
+
+
+def save_fixtures(base_url, dest_dir, listings=10, details=50):
+    """
+    Salva em dest_dir páginas reais do site (índice, páginas do catálogo e páginas de
+    detalhe), com um manifest.json que guarda o tipo e a URL de cada arquivo.
+    """
+    fetcher = scraper.Fetcher(rate=0)
+    os.makedirs(dest_dir, exist_ok=True)
+    manifest = []
+
+    def save(kind, url):
+        nome = f'{kind}-{len(manifest):03d}.html'
+        with open(os.path.join(dest_dir, nome), 'w', encoding='utf-8') as f:
+            f.write(fetcher.get(url))
+        manifest.append({'file': nome, 'kind': kind, 'url': url})
+
+    save('index', urljoin(base_url, 'index.html'))
+    detail_urls = []
+    url = urljoin(base_url, 'catalogue/page-1.html')
+    for _ in range(listings):
+        html = fetcher.get(url)
+        books, next_url, _ = scraper.parse_listing_page(html, url)
+        save('listing', url)
+        detail_urls.extend(book['url'] for book in books)
+        if not next_url:
+            break
+        url = next_url
+    for url in detail_urls[:details]:
+        save('detail', url)
+    with open(os.path.join(dest_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_fixtures(fixtures_dir):
+    """Lista de (tipo, url, html) das páginas salvas por save_fixtures."""
+    with open(os.path.join(fixtures_dir, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    fixtures = []
+    for item in manifest:
+        with open(os.path.join(fixtures_dir, item['file']), encoding='utf-8') as f:
+            fixtures.append((item['kind'], item['url'], f.read()))
+    return fixtures
+
+
+def _fixtures_from_mirror(dest_dir, csv_path):
+    """Gera as fixtures a partir do mirror local (ver scripts/local_mirror.py) quando não há páginas salvas."""
+    from scripts.local_mirror import build_mirror, serve_mirror, load_books_csv
+
+    server, base_url = serve_mirror(build_mirror(load_books_csv(csv_path), tempfile.mkdtemp(prefix='books_mirror_')))
+    try:
+        save_fixtures(base_url, dest_dir)
+    finally:
+        server.shutdown()
+
+
+@contextlib.contextmanager
+def _without_strainers():
+    """Parsing do documento inteiro, como antes dos SoupStrainer (para comparação)."""
+    originais = scraper.LISTING_STRAINER, scraper.BREADCRUMB_STRAINER, scraper.CATEGORIES_STRAINER
+    scraper.LISTING_STRAINER = scraper.BREADCRUMB_STRAINER = scraper.CATEGORIES_STRAINER = None
+    try:
+        yield
+    finally:
+        scraper.LISTING_STRAINER, scraper.BREADCRUMB_STRAINER, scraper.CATEGORIES_STRAINER = originais
+
+
+def _parse(kind, url, html, features):
+    fn = PARSE_FUNCTIONS[kind]
+    if kind == 'detail':
+        return fn(html, features=features)
+    return fn(html, url, features=features)
+
+
+def _parse_item(item, features):
+    return _parse(*item, features)
+
+
+def measure(fixtures, features, repeat):
+    """Mediana do tempo para parsear todas as fixtures de cada tipo; retorna {tipo: (segundos, páginas, bytes)}."""
+    resultados = {}
+    for kind in PARSE_FUNCTIONS:
+        pages = [item for item in fixtures if item[0] == kind]
+        if not pages:
+            continue
+        samples = []
+        for _ in range(repeat):
+            inicio = time.perf_counter()
+            for item in pages:
+                _parse(*item, features)
+            samples.append(time.perf_counter() - inicio)
+        resultados[kind] = (statistics.median(samples), len(pages), sum(len(html) for _, _, html in pages))
+    return resultados
+
+
+def measure_processes(fixtures, features, processes, copies):
+    """Tempo para parsear `copies` cópias das fixtures em série e em um pool de processos."""
+    items = [item for item in fixtures for _ in range(copies)]
+    inicio = time.perf_counter()
+    for item in items:
+        _parse(*item, features)
+    serial = time.perf_counter() - inicio
+
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        list(pool.map(_parse_item, items[:processes], [features] * processes))  # aquece os processos
+        inicio = time.perf_counter()
+        list(pool.map(_parse_item, items, [features] * len(items), chunksize=8))
+        pool_seconds = time.perf_counter() - inicio
+    return len(items), serial, pool_seconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmark do parsing das páginas do scraper.')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Diretório com as páginas salvas (manifest.json).')
+    parser.add_argument('--save-from', default=None,
+                        help='Salva as fixtures a partir deste site antes de medir (ex.: https://books.toscrape.com/).')
+    parser.add_argument('--csv', default='data/books_data.csv', help='CSV usado pelo mirror local quando não há fixtures.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--copies', type=int, default=20, help='Cópias das fixtures no teste com processos.')
+    args = parser.parse_args()
+
+    if args.save_from:
+        save_fixtures(args.save_from, args.fixtures)
+    elif not os.path.exists(os.path.join(args.fixtures, 'manifest.json')):
+        print(f"Sem fixtures em {args.fixtures}: gerando a partir do mirror local ({args.csv}).")
+        _fixtures_from_mirror(args.fixtures, args.csv)
+    fixtures = load_fixtures(args.fixtures)
+
+    backends = [name for name in scraper.PARSERS if name != 'auto']
+    disponiveis = []
+    for name in backends:
+        try:
+            disponiveis.append(scraper.resolve_parser(name))
+        except RuntimeError:
+            print(f"Tree builder '{name}' indisponível (pip install lxml).")
+
+    print(f"\n{'backend':<34} {'tipo':<8} {'páginas':>7} {'ms/página':>10} {'MB/s':>7}")
+    base = {}
+    for features in disponiveis:
+        with _without_strainers():
+            esperado = [_parse(*item, features) for item in fixtures]
+            variantes = [(f'{features} (documento inteiro)', measure(fixtures, features, args.repeat))]
+        if [_parse(*item, features) for item in fixtures] != esperado:
+            print(f"ATENÇÃO: o parsing com SoupStrainer ({features}) difere do documento inteiro.")
+        variantes.append((f'{features} + SoupStrainer', measure(fixtures, features, args.repeat)))
+        for nome, resultados in variantes:
+            for kind, (segundos, paginas, tamanho) in resultados.items():
+                base.setdefault(kind, segundos)
+                print(f"{nome:<34} {kind:<8} {paginas:>7} {segundos / paginas * 1000:>10.3f} "
+                      f"{tamanho / 1e6 / segundos:>7.1f}  {base[kind] / segundos:>5.1f}x")
+
+    features = scraper.resolve_parser('auto')
+    total, serial, pool_seconds = measure_processes(fixtures, features, args.processes, args.copies)
+    print(f"\n{total} páginas ({features} + SoupStrainer): {serial:.2f}s em série, "
+          f"{pool_seconds:.2f}s com {args.processes} processos ({serial / pool_seconds:.1f}x).")
@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import tempfile
+import statistics
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.synthetic_catalog import build_catalog
+
+QUERIES = ['story', 'light', 'dark night', 'secret garden', 'win', 'golden empire', 'lost', 'heart of']
+
+
+def percentiles(samples):
+    """Retorna p50 e p99 (em milissegundos) de uma lista de durações em segundos."""
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def _measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        for term in QUERIES:
+            inicio = time.perf_counter()
+            fn(term)
+            samples.append(time.perf_counter() - inicio)
+    return samples
+
+
+def run_benchmark(db_path, repeat=20):
+    from api import create_app
+    from api.models import Book
+    from api.search import fts_match_expression, title_matches
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(db_path)})
+    client = app.test_client()
+    with app.app_context():
+        def like_query(term):
+            return Book.query.filter(Book.titulo.ilike(f'%{term}%')).all()
+
+        def fts_query(term):
+            matches = title_matches(fts_match_expression(term))
+            return Book.query.join(matches, matches.c.rowid == Book.id).order_by(matches.c.rank).all()
+
+        resultados = {
+            'ILIKE %termo% (SQL)': _measure(like_query, repeat),
+            'FTS5 MATCH (SQL)': _measure(fts_query, repeat),
+        }
+    resultados['GET /books/search?title= (FTS5)'] = _measure(
+        lambda term: client.get('/api/v1/books/search', query_string={'title': term}), repeat)
+    resultados['GET /books/search?category='] = _measure(
+        lambda term: client.get('/api/v1/books/search', query_string={'category': 'poetry'}), repeat)
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Latência p50/p99 da busca por título: ILIKE vs FTS5.')
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--db', default=None, help='Banco já gerado (padrão: gera um catálogo sintético temporário).')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = args.db
+    if not db_path:
+        db_path = os.path.join(tempfile.mkdtemp(), 'bench_search.db')
+        print(f"Gerando catálogo sintético com {args.books} livros em {db_path}...")
+        build_catalog(db_path, args.books)
+
+    print(f"\n{'consulta':<36} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for nome, samples in run_benchmark(db_path, args.repeat).items():
+        p50, p99 = percentiles(samples)
+        print(f"{nome:<36} {p50:>10.2f} {p99:>10.2f}")
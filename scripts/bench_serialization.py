@@ -0,0 +1,70 @@
+import sys
+import os
+import time
+import statistics
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.synthetic_catalog import parse_size
+from scripts.bench_api import catalog_path
+
+
+def _measure(fn, repeat):
+    """Executa fn() `repeat` vezes; retorna (mediana em segundos, bytes da resposta)."""
+    fn()
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        size = len(fn())
+        samples.append(time.perf_counter() - inicio)
+    return statistics.median(samples), size
+
+
+def run_benchmark(db_path, repeat=5):
+    """
+    Compara a resposta completa de /books (e o streaming NDJSON) no caminho antigo,
+    que instancia Book e chama to_dict() + jsonify da stdlib, com o caminho atual
+    (tuplas de colunas) usando a stdlib e o orjson.
+    """
+    from flask import jsonify
+    from api import create_app
+    from api.models import Book
+
+    uri = 'sqlite:///' + os.path.abspath(db_path)
+    resultados = {}
+
+    antigo = create_app({'SQLALCHEMY_DATABASE_URI': uri, 'HTTP_CACHE_ENABLED': False, 'JSON_SERIALIZER': 'stdlib'})
+
+    def caminho_antigo():
+        with antigo.test_request_context('/api/v1/books'):
+            return jsonify([book.to_dict() for book in Book.query.all()]).get_data()
+
+    resultados['antes: ORM + to_dict + json (stdlib)'] = _measure(caminho_antigo, repeat)
+
+    for serializer in ('stdlib', 'orjson'):
+        app = create_app({'SQLALCHEMY_DATABASE_URI': uri, 'HTTP_CACHE_ENABLED': False, 'JSON_SERIALIZER': serializer})
+        client = app.test_client()
+        resultados[f'depois: tuplas + {serializer}'] = _measure(
+            lambda: client.get('/api/v1/books').get_data(), repeat)
+        resultados[f'depois: tuplas + {serializer} (ndjson)'] = _measure(
+            lambda: client.get('/api/v1/books?stream=ndjson').get_data(), repeat)
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Vazão (bytes/s) da serialização de /books: antes e depois.')
+    parser.add_argument('--books', type=parse_size, default=100_000, help='Tamanho do catálogo (ex.: 100k).')
+    parser.add_argument('--db', default=None, help='Banco já gerado (padrão: catálogo sintético em data/benchmarks/).')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = args.db or catalog_path(args.books)
+    resultados = run_benchmark(db_path, args.repeat)
+
+    base = next(iter(resultados.values()))[0]
+    print(f"\n{'caminho':<42} {'tempo (ms)':>11} {'MB':>8} {'MB/s':>8} {'ganho':>7}")
+    for nome, (segundos, size) in resultados.items():
+        print(f"{nome:<42} {segundos * 1000:>11.1f} {size / 1e6:>8.1f} {size / 1e6 / segundos:>8.1f} "
+              f"{base / segundos:>6.1f}x")
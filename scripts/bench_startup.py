@@ -0,0 +1,148 @@
+import sys
+import os
+import json
+import time
+import socket
+import statistics
+import subprocess
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Módulos pesados cuja presença após a inicialização é reportada.
+HEAVY_MODULES = ('numpy', 'pandas', 'flasgger', 'jsonschema', 'bs4', 'requests', 'pyarrow')
+
+# Executado em um processo novo a cada medição: tempos do import, da criação do app,
+# da primeira resposta e do primeiro acesso à documentação (Swagger).
+API_CHILD = '''
+import sys, time, json
+inicio = time.perf_counter()
+sys.path.insert(0, {root!r})
+from api import create_app
+importado = time.perf_counter()
+app = create_app({config!r})
+criado = time.perf_counter()
+client = app.test_client()
+status = client.get('/api/v1/health').status_code
+respondido = time.perf_counter()
+carregados = {{name: name in sys.modules for name in {heavy!r}}}
+docs = [client.get(url).status_code for url in ('/apidocs/', '/apispec_1.json')]
+documentado = time.perf_counter()
+print(json.dumps({{
+    'import': importado - inicio, 'create_app': criado - importado,
+    'primeira_resposta': respondido - criado, 'docs': documentado - respondido,
+    'status': [status] + docs, 'modulos': carregados,
+}}))
+'''
+
+# Import do scraper e boot de um processo de parsing (PageParser com processes=1).
+SCRAPER_CHILD = '''
+import sys, time, json
+inicio = time.perf_counter()
+sys.path.insert(0, {root!r})
+from scripts import scraper
+importado = time.perf_counter()
+carregados = {{name: name in sys.modules for name in {heavy!r}}}
+parser = scraper.PageParser(processes=1)
+parser.parse(scraper.parse_book_category, '<ul class="breadcrumb"><li><a href="#">Poetry</a></li></ul>')
+parseado = time.perf_counter()
+parser.close()
+print(json.dumps({{
+    'import': importado - inicio, 'primeiro_parse_em_processo': parseado - importado,
+    'modulos': carregados,
+}}))
+'''
+
+
+def run_child(code, env=None):
+    """Roda `code` em um interpretador novo; retorna (tempo total do processo, JSON impresso)."""
+    inicio = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, env={**os.environ, **(env or {})},
+                            capture_output=True, text=True, check=True)
+    total = time.perf_counter() - inicio
+    return total, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_child(code, repeat, env=None):
+    """Mediana de cada tempo em `repeat` processos novos (o primeiro, de aquecimento, é descartado)."""
+    run_child(code, env)
+    runs = [run_child(code, env) for _ in range(repeat)]
+    tempos = {'processo': statistics.median(total for total, _ in runs)}
+    for key, value in runs[0][1].items():
+        if isinstance(value, float):
+            tempos[key] = statistics.median(data[key] for _, data in runs)
+    return tempos, runs[0][1]
+
+
+def measure_gunicorn(repeat, env=None, timeout=60):
+    """Tempo (mediana) entre iniciar o gunicorn (1 worker) e a primeira resposta 200 de /health."""
+    import requests
+
+    samples = []
+    for _ in range(repeat):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        inicio = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', '1', '--bind', f'127.0.0.1:{port}',
+             '--log-level', 'warning', '--access-logfile', os.devnull],
+            cwd=PROJECT_ROOT, env={**os.environ, **(env or {})},
+        )
+        try:
+            limite = time.monotonic() + timeout
+            while True:
+                try:
+                    if requests.get(f'http://127.0.0.1:{port}/api/v1/health', timeout=5).status_code == 200:
+                        break
+                except requests.ConnectionError:
+                    pass
+                if process.poll() is not None or time.monotonic() > limite:
+                    raise RuntimeError('gunicorn não respondeu.')
+                time.sleep(0.01)
+            samples.append(time.perf_counter() - inicio)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return statistics.median(samples)
+
+
+def _format(tempos):
+    return '  '.join(f'{key} {value * 1000:7.1f} ms' for key, value in tempos.items())
+
+
+def _loaded(data):
+    return ', '.join(name for name, loaded in data['modulos'].items() if loaded) or '-'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Mede a inicialização: import, create_app, primeira resposta, documentação e boot do gunicorn.')
+    parser.add_argument('--db', default='data/books.db', help='Banco usado pela API (padrão: data/books.db).')
+    parser.add_argument('--repeat', type=int, default=5, help='Processos medidos por cenário.')
+    parser.add_argument('--gunicorn', action='store_true', help='Mede também o boot do gunicorn até a primeira resposta.')
+    args = parser.parse_args()
+
+    database_uri = 'sqlite:///' + os.path.abspath(args.db)
+    cenarios = [
+        ('api (docs lazy, backend sql)', {'API_DOCS': 'lazy'}),
+        ('api (docs eager, backend sql)', {'API_DOCS': 'eager'}),
+        ('api (docs off, backend sql)', {'API_DOCS': 'off'}),
+        ('api (docs lazy, backend columnar)', {'API_DOCS': 'lazy', 'BOOKS_BACKEND': 'columnar'}),
+    ]
+    for nome, config in cenarios:
+        code = API_CHILD.format(root=PROJECT_ROOT, config={'SQLALCHEMY_DATABASE_URI': database_uri, **config},
+                                heavy=HEAVY_MODULES)
+        tempos, data = measure_child(code, args.repeat)
+        print(f'{nome:<36} {_format(tempos)}')
+        print(f'{"":<36} status {data["status"]}, carregados na primeira resposta: {_loaded(data)}')
+
+    tempos, data = measure_child(SCRAPER_CHILD.format(root=PROJECT_ROOT, heavy=HEAVY_MODULES), args.repeat)
+    print(f'{"scraper":<36} {_format(tempos)}')
+    print(f'{"":<36} carregados no import: {_loaded(data)}')
+
+    if args.gunicorn:
+        for mode in ('lazy', 'eager'):
+            segundos = measure_gunicorn(args.repeat, {'API_DOCS': mode, 'DATABASE_PATH': os.path.abspath(args.db)})
+            print(f'{f"gunicorn (docs {mode})":<36} primeira resposta {segundos * 1000:7.1f} ms')
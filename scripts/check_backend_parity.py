@@ -0,0 +1,26 @@
+import sys
+import os
+import argparse
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARITY_TESTS = os.path.join(PROJECT_ROOT, 'tests', 'test_backend_parity.py')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Verifica se o backend 'columnar' responde o mesmo JSON que o backend 'sql' "
+                    "(roda tests/test_backend_parity.py).")
+    parser.add_argument('--db', default='data/books.db', help="Banco a comparar (padrão: data/books.db).")
+    parser.add_argument('--books', type=int, default=None,
+                        help='Em vez de --db, gera um catálogo sintético temporário com N livros.')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    import pytest
+
+    if args.books:
+        os.environ.pop('PARITY_DB', None)
+        os.environ['PARITY_BOOKS'] = str(args.books)
+    else:
+        os.environ['PARITY_DB'] = os.path.abspath(args.db)
+    sys.exit(pytest.main([PARITY_TESTS, '-v' if args.verbose else '-q', '-p', 'no:cacheprovider']))
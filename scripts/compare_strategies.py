@@ -0,0 +1,64 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.scraper import STRATEGIES, DEFAULT_WORKERS, Fetcher, scrape_all_books
+from scripts.local_mirror import build_mirror, serve_mirror, load_books_csv
+
+
+def compare_strategies(base_url, workers=DEFAULT_WORKERS, rate=0):
+    """
+    Roda cada estratégia de scraping contra base_url e retorna, por estratégia,
+    o número de requisições, o tempo decorrido e os livros encontrados.
+    """
+    resultados = {}
+    for strategy in sorted(STRATEGIES):
+        fetcher = Fetcher(workers=workers, rate=rate)
+        inicio = time.perf_counter()
+        books = scrape_all_books(base_url, strategy=strategy, workers=workers, fetcher=fetcher)
+        resultados[strategy] = {
+            'requisicoes': fetcher.requests_made,
+            'segundos': time.perf_counter() - inicio,
+            'livros': books,
+        }
+    return resultados
+
+
+def _key(book):
+    return book['titulo'], book['imagem_url']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compara as estratégias de scraping (requisições e tempo) contra um mirror local.')
+    parser.add_argument('--base-url', default=None, help='Mirror já em execução (padrão: gera um a partir do CSV).')
+    parser.add_argument('--csv', default='data/books_data.csv')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--rate', type=float, default=0, help='Requisições por segundo (0 = sem limite).')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        diretorio = build_mirror(load_books_csv(args.csv), tempfile.mkdtemp(prefix='books_mirror_'))
+        server, base_url = serve_mirror(diretorio)
+
+    try:
+        resultados = compare_strategies(base_url, workers=args.workers, rate=args.rate)
+    finally:
+        if server:
+            server.shutdown()
+
+    print(f"\n{'estratégia':<12} {'livros':>7} {'requisições':>12} {'tempo (s)':>10}")
+    for strategy, r in resultados.items():
+        print(f"{strategy:<12} {len(r['livros']):>7} {r['requisicoes']:>12} {r['segundos']:>10.2f}")
+
+    conjuntos = {strategy: {_key(b): b for b in r['livros']} for strategy, r in resultados.items()}
+    referencia = conjuntos['detail']
+    for strategy, livros in conjuntos.items():
+        if livros != referencia:
+            print(f"ATENÇÃO: a estratégia '{strategy}' retornou livros diferentes da estratégia 'detail'.")
@@ -1,38 +1,317 @@
 import sys
 import os
+import time
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def populate_database():
+BOOK_FIELDS = ('titulo', 'preco', 'rating', 'disponibilidade', 'categoria', 'imagem_url')
+# Colunas gravadas pela carga: os campos do scraper mais os derivados deles.
+LOAD_COLUMNS = BOOK_FIELDS + ('rating_numerico',)
+BATCH_SIZE = 1000
+
+UPSERT_SQL = f"""
+    INSERT INTO book ({', '.join(LOAD_COLUMNS)})
+    VALUES ({', '.join(':' + column for column in LOAD_COLUMNS)})
+    ON CONFLICT (titulo, imagem_url) DO UPDATE SET
+        {', '.join(f'{column} = excluded.{column}' for column in LOAD_COLUMNS)}
+    WHERE {' OR '.join(f'book.{column} IS NOT excluded.{column}' for column in LOAD_COLUMNS)}
+"""
+
+
+def migrate_database():
+    """
+    Aplica ao banco existente as alterações de schema que o db.create_all() não faz
+    em tabelas já criadas. Pode ser executada várias vezes.
+    """
+    from api import db
+    from api.models import RATING_VALUES
+    from api.stats import rebuild_stats
+
+    # WAL é persistente no arquivo: a API lê (inclusive com o banco aberto somente para
+    # leitura) enquanto uma carga escreve.
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+
+    with db.engine.begin() as conn:
+        colunas = {row[1] for row in conn.exec_driver_sql('PRAGMA table_info(book)')}
+        if 'rating_numerico' not in colunas:
+            conn.exec_driver_sql('ALTER TABLE book ADD COLUMN rating_numerico INTEGER')
+        casos = ' '.join(f"WHEN '{rating}' THEN {valor}" for rating, valor in RATING_VALUES.items())
+        conn.exec_driver_sql(
+            f'UPDATE book SET rating_numerico = CASE rating {casos} END WHERE rating_numerico IS NULL'
+        )
+        # Cargas antigas apenas acrescentavam linhas; mantém a primeira cópia de cada livro.
+        conn.exec_driver_sql("""
+            DELETE FROM book WHERE id NOT IN (
+                SELECT MIN(id) FROM book GROUP BY titulo, imagem_url
+            )
+        """)
+        conn.exec_driver_sql(
+            'CREATE UNIQUE INDEX IF NOT EXISTS uq_book_titulo_imagem_url ON book (titulo, imagem_url)'
+        )
+        conn.exec_driver_sql(
+            'CREATE INDEX IF NOT EXISTS ix_book_categoria_nocase ON book (categoria COLLATE NOCASE)'
+        )
+        conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_book_categoria ON book (categoria)')
+        conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_book_preco ON book (preco)')
+        conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_book_rating_numerico ON book (rating_numerico DESC)')
+        # Índice full-text dos títulos, com o conteúdo lido da própria tabela book.
+        fts_exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_fts'"
+        ).scalar()
+        if not fts_exists:
+            conn.exec_driver_sql("""
+                CREATE VIRTUAL TABLE book_fts USING fts5(
+                    titulo, content='book', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            conn.exec_driver_sql("INSERT INTO book_fts (book_fts) VALUES ('rebuild')")
+        snapshot_exists = conn.exec_driver_sql('SELECT 1 FROM stats_snapshot LIMIT 1').scalar()
+        if not snapshot_exists:
+            rebuild_stats(conn)
+        version_exists = conn.exec_driver_sql('SELECT 1 FROM dataset_version WHERE id = 1').scalar()
+        if not version_exists:
+            bump_dataset_version(conn)
+
+
+def bump_dataset_version(conn):
+    """Troca a versão do dataset, usada pela API para ETags e para invalidar o cache."""
+    from api import db
+
+    conn.execute(
+        db.text('INSERT OR REPLACE INTO dataset_version (id, versao, atualizado_em) VALUES (1, :versao, :agora)'),
+        {'versao': uuid.uuid4().hex, 'agora': datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)}
+    )
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def normalize_book(book):
+    """Linha da tabela book a partir de um livro do scraper: os campos do scraper mais os derivados."""
+    from api.models import RATING_VALUES
+
+    return {**{field: book[field] for field in BOOK_FIELDS}, 'rating_numerico': RATING_VALUES.get(book['rating'])}
+
+
+def create_keys_table(conn, name, temporary=True):
+    """Tabela das chaves (titulo, imagem_url) recebidas pela carga, usada para remover os livros ausentes."""
+    conn.exec_driver_sql(
+        f'CREATE {"TEMP " if temporary else ""}TABLE IF NOT EXISTS {name} '
+        '(titulo TEXT, imagem_url TEXT, PRIMARY KEY (titulo, imagem_url)) WITHOUT ROWID'
+    )
+
+
+def upsert_rows(conn, rows, keys_table=None):
+    """
+    Grava um lote de linhas (ver normalize_book) com upsert e, com keys_table, registra
+    as chaves recebidas. Retorna quantas linhas foram inseridas ou alteradas.
+    """
+    from api import db
+
+    alterados = conn.execute(db.text(UPSERT_SQL), rows).rowcount
+    if keys_table:
+        conn.execute(
+            db.text(f'INSERT OR IGNORE INTO {keys_table} (titulo, imagem_url) VALUES (:titulo, :imagem_url)'),
+            rows
+        )
+    return alterados
+
+
+def finish_load(conn, alterados, keys_table=None):
+    """
+    Fecha uma carga na transação de `conn`: com keys_table, remove os livros que não vieram
+    na carga e descarta a tabela de chaves; se algo mudou, reconstrói o índice full-text e
+    o snapshot de estatísticas e troca a versão do dataset. Retorna quantos livros saíram.
+    """
+    from api.stats import rebuild_stats
+
+    removidos = 0
+    if keys_table:
+        removidos = conn.exec_driver_sql(f"""
+            DELETE FROM book WHERE NOT EXISTS (
+                SELECT 1 FROM {keys_table} k
+                WHERE k.titulo = book.titulo AND k.imagem_url = book.imagem_url
+            )
+        """).rowcount
+        conn.exec_driver_sql(f'DROP TABLE {keys_table}')
+    if alterados or removidos:
+        conn.exec_driver_sql("INSERT INTO book_fts (book_fts) VALUES ('rebuild')")
+        rebuild_stats(conn)
+        bump_dataset_version(conn)
+    return removidos
+
+
+def bulk_load(books_data, delete_missing=True, batch_size=BATCH_SIZE):
+    """
+    Carrega os livros no banco com upserts em lote (INSERT ... ON CONFLICT), usando
+    (titulo, imagem_url) como chave natural, tudo em uma única transação.
+
+    books_data pode ser qualquer iterável (inclusive um gerador): os livros são
+    consumidos em lotes de batch_size, sem manter a lista inteira em memória.
+    Com delete_missing, os livros do banco que não vieram na carga são removidos.
+    O índice full-text (book_fts) e o snapshot de estatísticas (stats_snapshot) são
+    reconstruídos na mesma transação.
+
+    Retorna um dicionário com linhas inseridas, atualizadas, removidas e a vazão da carga.
+    """
+    from api import db
+
+    keys_table = 'carga_chaves' if delete_missing else None
+    inicio = time.perf_counter()
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+        synchronous = conn.exec_driver_sql('PRAGMA synchronous').scalar()
+        conn.exec_driver_sql('PRAGMA synchronous=NORMAL')
+        conn.commit()
+        try:
+            antes = conn.exec_driver_sql('SELECT COUNT(*) FROM book').scalar()
+            if keys_table:
+                create_keys_table(conn, keys_table)
+                conn.exec_driver_sql(f'DELETE FROM {keys_table}')
+
+            processados = alterados = 0
+            for batch in _batches(books_data, batch_size):
+                rows = [normalize_book(book) for book in batch]
+                alterados += upsert_rows(conn, rows, keys_table)
+                processados += len(rows)
+
+            depois_upsert = conn.exec_driver_sql('SELECT COUNT(*) FROM book').scalar()
+            removidos = finish_load(conn, alterados, keys_table)
+            conn.commit()
+            # Atualiza as estatísticas usadas pelo planner para escolher os índices.
+            conn.exec_driver_sql('PRAGMA optimize')
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql(f'PRAGMA synchronous={int(synchronous)}')
+
+    segundos = time.perf_counter() - inicio
+    inseridos = depois_upsert - antes
+    return {
+        'processados': processados,
+        'inseridos': inseridos,
+        'atualizados': alterados - inseridos,
+        'removidos': removidos,
+        'segundos': round(segundos, 3),
+        'linhas_por_segundo': round(processados / segundos) if segundos > 0 else processados,
+    }
+
+
+def export_snapshot():
+    """
+    Grava o snapshot Parquet usado por /api/v1/export (ver api/export.py) com a versão
+    atual do dataset. Retorna o caminho do arquivo e a quantidade de livros.
+    """
+    from api import db
+    from api.export import snapshot_path, write_snapshot
+
+    path = snapshot_path()
+    with db.engine.connect() as conn:
+        versao = conn.exec_driver_sql('SELECT versao FROM dataset_version WHERE id = 1').scalar()
+        return path, write_snapshot(conn, path, versao)
+
+
+def populate_database(incremental=False, base_url=None, commit_every=BATCH_SIZE, resume=True, parse_processes=0,
+                      images=False, image_processes=0):
     """
     Executa o scraper e popula o banco de dados com os livros.
     Também salva uma cópia dos dados em CSV.
+
+    A carga é um upsert em lote: rodar de novo atualiza os livros existentes em vez de
+    duplicá-los, e os livros que sumiram do site são removidos. No modo incremental o
+    scraper usa o cache de páginas (requisições condicionais) e apenas os livros de
+    páginas alteradas são enviados ao banco; nesse modo nada é removido.
+
+    Os livros seguem em streaming do scraper para o CSV e para o banco (ver
+    scripts/pipeline.py), com um commit a cada ~commit_every livros. Uma carga
+    interrompida é retomada a partir das páginas já gravadas (resume=False recomeça).
+    Com parse_processes > 0, o HTML é parseado em um pool de processos.
+    Com images, as capas ainda não baixadas vão para o armazenamento local, com as
+    miniaturas geradas em image_processes processos (ver scripts/image_cache.py).
     """
     from api import create_app, db
-    from api.models import Book
-    from scripts.scraper import scrape_all_books, save_to_csv
-    books_data = scrape_all_books()
-    save_to_csv(books_data)
-    
+    from scripts.scraper import BASE_URL, Fetcher, PageParser, iter_scraped_pages
+    from scripts.page_cache import PageCache
+    from scripts.pipeline import CHECKPOINT_PATH, CSV_PATH, Checkpoint, run_pipeline
+
     app = create_app()
     with app.app_context():
         print("Criando tabelas do banco de dados...")
         db.create_all()
-        
+        migrate_database()
+
+        base_url = base_url or BASE_URL
+        params = {'base_url': base_url, 'incremental': incremental, 'database': db.engine.url.database}
+        if resume:
+            checkpoint = Checkpoint.load(CHECKPOINT_PATH, params, CSV_PATH)
+        else:
+            checkpoint = Checkpoint(CHECKPOINT_PATH, params)
+        if checkpoint.resumed:
+            print(f"Retomando a carga interrompida: {len(checkpoint.done_pages)} páginas já gravadas.")
+
+        cache = PageCache() if incremental else None
+        page_parser = PageParser(processes=parse_processes)
+        fetcher = Fetcher(cache=cache, parser=page_parser)
+        pages = iter_scraped_pages(base_url, fetcher=fetcher, known_pages=checkpoint.listings,
+                                   done_pages=checkpoint.done_pages)
         print("Populando o banco de dados com os livros...")
-        for book_data in books_data:
-            new_book = Book(
-                titulo=book_data['titulo'],
-                preco=book_data['preco'],
-                rating=book_data['rating'],
-                disponibilidade=book_data['disponibilidade'],
-                categoria=book_data['categoria'],
-                imagem_url=book_data['imagem_url']
-            )
-            db.session.add(new_book)
-        
-        db.session.commit()
-        print("Banco de dados populado com sucesso!")
+        try:
+            stats = run_pipeline(pages, incremental, commit_every, CSV_PATH, checkpoint)
+        finally:
+            page_parser.close()
+        if cache is not None:
+            cache.save()
+        print(f"Banco de dados populado com sucesso! {stats['inseridos']} inseridos, "
+              f"{stats['atualizados']} atualizados, {stats['removidos']} removidos "
+              f"({fetcher.requests_made} requisições, {fetcher.pages_unchanged} páginas inalteradas, "
+              f"{stats['segundos']}s).")
+        path, total = export_snapshot()
+        print(f"Snapshot Parquet gravado em {path} ({total} livros).")
+        if images:
+            from scripts.image_cache import cache_covers, print_stats
+
+            print("Baixando as capas...")
+            print_stats(cache_covers(fetcher, app.config['IMAGES_DIR'], app.config['COVER_SIZES'],
+                                     processes=image_processes))
 
 if __name__ == '__main__':
-    populate_database()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Executa o scraper e popula o banco de dados.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Usa o cache de páginas e grava apenas os livros alterados.')
+    parser.add_argument('--base-url', default=None, help='Site de origem (padrão: books.toscrape.com).')
+    parser.add_argument('--commit-every', type=int, default=BATCH_SIZE,
+                        help='Livros gravados por commit (a carga fica visível na API aos poucos).')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignora o checkpoint de uma carga interrompida e recomeça do zero.')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='Processos para o parsing do HTML (0 = nas threads do scraper).')
+    parser.add_argument('--images', action='store_true',
+                        help='Baixa as capas para o armazenamento local e gera as miniaturas.')
+    parser.add_argument('--image-processes', type=int, default=os.cpu_count() or 1,
+                        help='Processos para gerar as miniaturas das capas (0 = no processo principal).')
+    parser.add_argument('--migrate-only', action='store_true',
+                        help='Apenas atualiza o schema de um books.db existente, sem rodar o scraper.')
+    args = parser.parse_args()
+    if args.migrate_only:
+        from api import create_app, db
+        with create_app().app_context():
+            db.create_all()
+            migrate_database()
+            export_snapshot()
+        print("Schema do banco de dados atualizado.")
+    else:
+        populate_database(incremental=args.incremental, base_url=args.base_url,
+                          commit_every=args.commit_every, resume=not args.restart,
+                          parse_processes=args.parse_processes, images=args.images,
+                          image_processes=args.image_processes)
@@ -0,0 +1,208 @@
+import sys
+import os
+import time
+import hashlib
+import mimetypes
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urljoin, urlsplit
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.scraper import DEFAULT_WORKERS, _bounded_map
+
+THUMBNAIL_QUALITY = 85
+
+PENDING_SQL = """
+    SELECT DISTINCT b.imagem_url FROM book b
+    LEFT JOIN book_image i ON i.imagem_url = b.imagem_url
+    WHERE i.imagem_url IS NULL
+"""
+INSERT_SQL = """
+    INSERT OR REPLACE INTO book_image (imagem_url, sha256, mimetype, baixada_em)
+    VALUES (:imagem_url, :sha256, :mimetype, :baixada_em)
+"""
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def image_mimetype(content_type, url):
+    """Tipo da imagem pelo Content-Type (ou, sem ele, pela extensão da URL); None se não for suportado."""
+    from api.covers import IMAGE_EXTENSIONS
+
+    mimetype = content_type.split(';')[0].strip().lower()
+    if mimetype not in IMAGE_EXTENSIONS:
+        mimetype = mimetypes.guess_type(url)[0]
+    return mimetype if mimetype in IMAGE_EXTENSIONS else None
+
+
+def make_thumbnails(source, targets):
+    """
+    Gera as miniaturas JPEG de `source`; targets é uma lista de (lado maior em pixels, caminho).
+    Miniaturas já existentes são mantidas (o caminho depende só do conteúdo). Roda nos processos
+    do pool, por isso recebe apenas caminhos e importa só o Pillow. Retorna quantas gerou.
+    """
+    targets = [(side, path) for side, path in targets if not os.path.exists(path)]
+    if not targets:
+        return 0
+    from PIL import Image
+
+    with Image.open(source) as original:
+        # Em JPEG, o draft decodifica direto numa escala reduzida (1/2, 1/4, 1/8) próxima da maior miniatura.
+        maior = max(side for side, _ in targets)
+        original.draft('RGB', (maior, maior))
+        if original.mode in ('RGBA', 'LA', 'P'):
+            rgba = original.convert('RGBA')
+            image = Image.new('RGB', rgba.size, 'white')
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        else:
+            image = original.convert('RGB')
+    for side, path in sorted(targets, reverse=True):
+        image.thumbnail((side, side), Image.LANCZOS)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        image.save(tmp_path, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        os.replace(tmp_path, path)
+    return len(targets)
+
+
+def pending_urls(conn, refresh=False):
+    """URLs de capa dos livros ainda sem imagem baixada (todas, com refresh)."""
+    if refresh:
+        return conn.exec_driver_sql('SELECT DISTINCT imagem_url FROM book').scalars().all()
+    return conn.exec_driver_sql(PENDING_SQL).scalars().all()
+
+
+def cache_covers(fetcher, root, sizes, workers=DEFAULT_WORKERS, processes=0, refresh=False, commit_every=500,
+                 urls=None, base_url=None):
+    """
+    Baixa as capas dos livros que ainda não têm imagem local (ou as `urls` informadas) e
+    gera as miniaturas. Com base_url, as capas são buscadas nesse site (ex.: o mirror local)
+    com o caminho da imagem_url; a tabela continua com a imagem_url original.
+
+    Os downloads usam `workers` threads com o Fetcher (limite de taxa e retries do scraper).
+    Cada original é gravado em `root` pelo SHA-256 do conteúdo (ver api.covers.image_path),
+    então capas repetidas ocupam um arquivo só. As miniaturas (`sizes`: nome -> lado maior)
+    são geradas com o Pillow em um pool de `processes` processos (0 = na thread principal),
+    em paralelo com os downloads. A tabela book_image recebe a capa depois que as miniaturas
+    ficam prontas, com um commit a cada ~commit_every imagens. Falhas de download e de
+    geração das miniaturas (ex.: um corpo que o Pillow não decodifica) apenas são contadas
+    em 'falhas': a capa fica pendente para a próxima execução.
+
+    Deve rodar num app context. Retorna um dicionário com as contagens e a duração.
+    """
+    from api import db
+    from api.covers import IMAGE_EXTENSIONS, image_path, thumbnail_path
+
+    inicio = time.perf_counter()
+    if urls is None:
+        with db.engine.connect() as conn:
+            urls = pending_urls(conn, refresh)
+    stats = {'pendentes': len(urls), 'baixadas': 0, 'miniaturas': 0, 'falhas': 0, 'bytes': 0}
+
+    def download(url):
+        try:
+            content, content_type = fetcher.get_bytes(urljoin(base_url, urlsplit(url).path) if base_url else url)
+        except Exception as exc:  # noqa: BLE001 - a falha é contada e a capa fica pendente
+            return url, None, exc
+        mimetype = image_mimetype(content_type, url)
+        if mimetype is None:
+            return url, None, ValueError(f'tipo de imagem não suportado: {content_type!r}')
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = image_path(root, sha256, IMAGE_EXTENSIONS[mimetype])
+        if not os.path.exists(path):
+            _write_atomic(path, content)
+        return url, (path, sha256, mimetype), len(content)
+
+    pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn')) if processes else None
+    pendentes = {}
+    rows = []
+
+    def thumbnails_done(row, gerar):
+        try:
+            stats['miniaturas'] += gerar()
+        except Exception as exc:  # noqa: BLE001 - a falha é contada e a capa fica pendente
+            stats['falhas'] += 1
+            print(f"Falha ao gerar as miniaturas de {row['imagem_url']}: {exc}")
+        else:
+            rows.append(row)
+
+    def collect(futures):
+        for future in futures:
+            thumbnails_done(pendentes.pop(future), future.result)
+
+    def flush(conn, force=False):
+        if rows and (force or len(rows) >= commit_every):
+            conn.execute(db.text(INSERT_SQL), rows)
+            conn.commit()
+            rows.clear()
+
+    try:
+        with ThreadPoolExecutor(workers) as executor, db.engine.connect() as conn:
+            for url, image, resultado in _bounded_map(executor, download, urls, workers * 4):
+                if image is None:
+                    stats['falhas'] += 1
+                    print(f"Falha ao baixar {url}: {resultado}")
+                    continue
+                path, sha256, mimetype = image
+                stats['baixadas'] += 1
+                stats['bytes'] += resultado
+                targets = [(side, thumbnail_path(root, sha256, name)) for name, side in sizes.items()]
+                row = {'imagem_url': url, 'sha256': sha256, 'mimetype': mimetype,
+                       'baixada_em': datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)}
+                if pool is None:
+                    thumbnails_done(row, lambda: make_thumbnails(path, targets))
+                else:
+                    pendentes[pool.submit(make_thumbnails, path, targets)] = row
+                    done, _ = wait(pendentes, timeout=0, return_when=FIRST_COMPLETED)
+                    collect(done)
+                flush(conn)
+            collect(wait(pendentes).done)
+            flush(conn, force=True)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    stats['segundos'] = round(time.perf_counter() - inicio, 3)
+    return stats
+
+
+def print_stats(stats):
+    print(f"Capas: {stats['baixadas']} de {stats['pendentes']} baixadas "
+          f"({stats['bytes'] / 1e6:.1f} MB), {stats['miniaturas']} miniaturas geradas, "
+          f"{stats['falhas']} falhas ({stats['segundos']}s).")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Baixa as capas dos livros do banco para o armazenamento local e gera as miniaturas.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Threads de download.')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Requisições por segundo (padrão: o do scraper; 0 desativa o limite).')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='Processos para gerar as miniaturas (0 = no processo principal).')
+    parser.add_argument('--refresh', action='store_true', help='Baixa de novo todas as capas, não só as pendentes.')
+    parser.add_argument('--base-url', default=None,
+                        help='Busca as capas neste site (ex.: o mirror local) em vez do host da imagem_url.')
+    args = parser.parse_args()
+
+    from api import create_app, db
+    from scripts.scraper import Fetcher
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        rate = {} if args.rate is None else {'rate': args.rate}
+        fetcher = Fetcher(workers=args.workers, **rate)
+        print_stats(cache_covers(fetcher, app.config['IMAGES_DIR'], app.config['COVER_SIZES'],
+                                 workers=args.workers, processes=args.processes, refresh=args.refresh,
+                                 base_url=args.base_url))
@@ -0,0 +1,184 @@
+import sys
+import os
+import re
+import csv
+import html
+import hashlib
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BOOKS_PER_PAGE = 20
+# Dimensões das capas geradas com images=True (as do site têm cerca de 400 x 600).
+COVER_SIZE = (400, 600)
+
+
+def _slugify(texto):
+    slug = re.sub(r'[^a-z0-9]+', '-', texto.lower()).strip('-')
+    return slug or 'livro'
+
+
+def _write(path, conteudo):
+    # O site real serve UTF-8 sem charset no Content-Type e o requests decodifica como
+    # latin-1; gravar em latin-1 reproduz exatamente os bytes originais a partir do CSV.
+    try:
+        dados = conteudo.encode('latin-1')
+    except UnicodeEncodeError:
+        dados = conteudo.encode('utf-8')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(dados)
+
+
+def _page(titulo, corpo):
+    return (
+        '<!DOCTYPE html>\n<html lang="en-us"><head><meta charset="utf-8">'
+        f'<title>{html.escape(titulo)}</title></head><body>{corpo}</body></html>\n'
+    )
+
+
+def _product_pod(book, prefixo):
+    titulo = html.escape(book['titulo'], quote=True)
+    resumo = html.escape(book['titulo'][:20])
+    return (
+        '<li><article class="product_pod">'
+        f'<div class="image_container"><a href="{prefixo}{book["_slug"]}/index.html">'
+        f'<img src="{prefixo}../{book["_imagem_path"]}" alt="{titulo}" class="thumbnail"></a></div>'
+        f'<p class="star-rating {book["rating"]}"><i class="icon-star"></i></p>'
+        f'<h3><a href="{prefixo}{book["_slug"]}/index.html" title="{titulo}">{resumo}...</a></h3>'
+        '<div class="product_price">'
+        f'<p class="price_color">£{float(book["preco"]):.2f}</p>'
+        f'<p class="instock availability"><i class="icon-ok"></i>\n    {html.escape(book["disponibilidade"])}\n</p>'
+        '</div></article></li>'
+    )
+
+
+def _listing(books, prefixo, numero, total):
+    pods = ''.join(_product_pod(book, prefixo) for book in books)
+    pager = f'<ul class="pager"><li class="current">Page {numero} of {total}</li>'
+    if numero < total:
+        pager += f'<li class="next"><a href="page-{numero + 1}.html">next</a></li>'
+    pager += '</ul>'
+    return f'<section><ol class="row">{pods}</ol>{pager}</section>'
+
+
+def _chunks(items, tamanho):
+    return [items[i:i + tamanho] for i in range(0, len(items), tamanho)] or [[]]
+
+
+def _write_cover(path, titulo):
+    """Capa JPEG de teste (cor derivada do título), no tamanho das capas do site."""
+    from PIL import Image
+
+    cor = tuple(hashlib.sha256(titulo.encode('utf-8')).digest()[:3])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new('RGB', COVER_SIZE, cor).save(path, 'JPEG', quality=90)
+
+
+def build_mirror(books, dest_dir, images=False):
+    """
+    Gera em dest_dir uma cópia estática do 'books.toscrape.com' a partir de uma
+    lista de dicionários de livros (mesmo formato produzido pelo scraper).
+    Útil para testar o scraper sem acessar o site real. Com images, grava também
+    uma capa JPEG para cada livro (para testar o download das capas).
+    """
+    books = [dict(book) for book in books]
+    categorias = sorted({book['categoria'] for book in books})
+    categoria_slugs = {cat: f'{_slugify(cat)}_{i}' for i, cat in enumerate(categorias, start=2)}
+
+    for numero, book in enumerate(books, start=1):
+        book['_slug'] = f'{_slugify(book["titulo"])}_{numero}'
+        book['_imagem_path'] = re.sub(r'^https?://[^/]+/', '', book['imagem_url'])
+        if images:
+            _write_cover(os.path.join(dest_dir, book['_imagem_path']), book['titulo'])
+
+    catalogo = os.path.join(dest_dir, 'catalogue')
+    paginas = _chunks(books, BOOKS_PER_PAGE)
+    for numero, pagina in enumerate(paginas, start=1):
+        _write(os.path.join(catalogo, f'page-{numero}.html'),
+               _page('All products', _listing(pagina, '', numero, len(paginas))))
+
+    for book in books:
+        categoria = html.escape(book['categoria'])
+        breadcrumb = (
+            '<ul class="breadcrumb">'
+            '<li><a href="../../index.html">Home</a></li>'
+            '<li><a href="../category/books_1/index.html">Books</a></li>'
+            f'<li><a href="../category/books/{categoria_slugs[book["categoria"]]}/index.html">{categoria}</a></li>'
+            f'<li class="active">{html.escape(book["titulo"])}</li></ul>'
+        )
+        _write(os.path.join(catalogo, book['_slug'], 'index.html'), _page(book['titulo'], breadcrumb))
+
+    itens = ''.join(
+        f'<li><a href="catalogue/category/books/{categoria_slugs[cat]}/index.html">\n    {html.escape(cat)}\n</a></li>'
+        for cat in categorias
+    )
+    sidebar = (
+        '<div class="side_categories"><ul class="nav nav-list">'
+        f'<li><a href="catalogue/category/books_1/index.html">Books</a><ul>{itens}</ul></li>'
+        '</ul></div>'
+    )
+    _write(os.path.join(dest_dir, 'index.html'),
+           _page('All products', sidebar + _listing(books[:BOOKS_PER_PAGE], 'catalogue/', 1, len(paginas))))
+
+    for cat in categorias:
+        pasta = os.path.join(catalogo, 'category', 'books', categoria_slugs[cat])
+        paginas_cat = _chunks([book for book in books if book['categoria'] == cat], BOOKS_PER_PAGE)
+        for numero, pagina in enumerate(paginas_cat, start=1):
+            nome = 'index.html' if numero == 1 else f'page-{numero}.html'
+            _write(os.path.join(pasta, nome),
+                   _page(cat, _listing(pagina, '../../../', numero, len(paginas_cat))))
+
+    return dest_dir
+
+
+class _MirrorHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        if getattr(self, 'command', None):
+            with self.server.lock:
+                self.server.requests_served += 1
+
+
+def serve_mirror(directory, port=0):
+    """
+    Serve o diretório gerado por build_mirror em uma thread de background.
+    Retorna o servidor e a URL base (terminada em '/'). Use server.shutdown() para parar.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(_MirrorHandler, directory=directory))
+    server.lock = threading.Lock()
+    server.requests_served = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/'
+
+
+def load_books_csv(filename='data/books_data.csv'):
+    """Lê o CSV gerado pelo scraper como lista de dicionários."""
+    with open(filename, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Serve uma cópia local do books.toscrape.com gerada a partir do CSV.')
+    parser.add_argument('--csv', default='data/books_data.csv')
+    parser.add_argument('--dir', default=None, help='Diretório de saída (padrão: temporário).')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--images', action='store_true', help='Gera também as capas dos livros (JPEG).')
+    args = parser.parse_args()
+
+    diretorio = build_mirror(load_books_csv(args.csv), args.dir or tempfile.mkdtemp(prefix='books_mirror_'),
+                             images=args.images)
+    server, url = serve_mirror(diretorio, args.port)
+    print(f"Mirror local servindo {diretorio} em {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
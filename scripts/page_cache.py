@@ -0,0 +1,62 @@
+import os
+import json
+import threading
+
+DEFAULT_CACHE_DIR = 'data/page_cache'
+# Incrementar quando os parsers do scraper mudarem, para descartar resultados antigos.
+PARSER_VERSION = 1
+
+
+class PageCache:
+    """
+    Cache em disco das páginas já buscadas pelo scraper, indexado por URL.
+
+    Para cada página guarda o ETag, o Last-Modified, o hash SHA-256 do conteúdo e o
+    resultado já parseado, de modo que páginas inalteradas (resposta 304 ou mesmo hash)
+    não precisam passar pelo BeautifulSoup de novo.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('parser_version') == PARSER_VERSION:
+                self.entries = data.get('entries', {})
+
+    def get(self, url):
+        with self.lock:
+            return self.entries.get(url)
+
+    def put(self, url, etag, last_modified, sha256, parsed):
+        with self.lock:
+            self.entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'sha256': sha256,
+                'parsed': parsed,
+            }
+
+    def conditional_headers(self, url):
+        """Cabeçalhos If-None-Match / If-Modified-Since para uma requisição condicional."""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def save(self):
+        """Grava o índice de forma atômica (arquivo temporário + rename)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with self.lock:
+            data = {'parser_version': PARSER_VERSION, 'entries': self.entries}
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
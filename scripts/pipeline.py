@@ -0,0 +1,281 @@
+import sys
+import os
+import csv
+import json
+import time
+import queue
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.database_setup import BOOK_FIELDS, BATCH_SIZE, normalize_book, create_keys_table, upsert_rows, finish_load
+
+CHECKPOINT_PATH = 'data/load_checkpoint.json'
+CSV_PATH = 'data/books_data.csv'
+# Lotes aguardando em cada fila (CSV e banco): limita a memória quando um destino atrasa.
+QUEUE_SIZE = 4
+# Tabela das chaves recebidas na carga; é uma tabela comum (e não TEMP) para sobreviver
+# a uma interrupção e permitir remover os livros ausentes ao final da carga retomada.
+KEYS_TABLE = 'carga_chaves_pendentes'
+
+
+class Checkpoint:
+    """
+    Progresso de uma carga em disco (JSON gravado de forma atômica): as páginas de listagem
+    já gravadas no CSV e no banco, as páginas de cada listagem e o tamanho do CSV nesse
+    ponto. Só é reaproveitado por uma carga com os mesmos parâmetros.
+    """
+
+    def __init__(self, path, params):
+        self.path = path
+        self.params = params
+        self.listings = {}
+        self.done_pages = set()
+        self.csv_offset = 0
+        self.resumed = False
+
+    @classmethod
+    def load(cls, path, params, csv_path):
+        checkpoint = cls(path, params)
+        if not os.path.exists(path):
+            return checkpoint
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        csv_size = os.path.getsize(csv_path) if os.path.exists(csv_path) else -1
+        if data.get('params') != params or csv_size < data['csv_offset']:
+            print(f"Checkpoint {path} ignorado: parâmetros diferentes ou CSV incompleto.")
+            return checkpoint
+        checkpoint.listings = data['listings']
+        checkpoint.done_pages = set(data['done_pages'])
+        checkpoint.csv_offset = data['csv_offset']
+        checkpoint.resumed = True
+        return checkpoint
+
+    def record(self, pages, csv_offset):
+        """Marca como concluídas as páginas [(listagem, páginas da listagem, página)] de um lote."""
+        for listing, page_urls, url in pages:
+            if page_urls is not None:
+                self.listings[listing] = page_urls
+            self.done_pages.add(url)
+        self.csv_offset = csv_offset
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'params': self.params,
+                'listings': self.listings,
+                'done_pages': sorted(self.done_pages),
+                'csv_offset': self.csv_offset,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def normalize(pages):
+    """Estágio 'normalize': converte os livros de cada página em linhas da tabela book."""
+    for listing, page_urls, url, books in pages:
+        yield (listing, page_urls, url), [(normalize_book(book), changed) for book, changed in books]
+
+
+def batched(pages, size):
+    """
+    Estágio 'batch': junta as linhas de páginas inteiras até somar pelo menos `size` linhas.
+    Cada lote leva as páginas que ele conclui, para o checkpoint.
+    """
+    rows, done = [], []
+    for page, page_rows in pages:
+        rows.extend(page_rows)
+        done.append(page)
+        if len(rows) >= size:
+            yield rows, done
+            rows, done = [], []
+    if done:
+        yield rows, done
+
+
+class CsvSink:
+    """Grava as linhas no CSV; ao retomar, volta o arquivo ao tamanho do último checkpoint."""
+
+    def __init__(self, filename, offset=0):
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        if offset:
+            self.file = open(filename, 'r+', newline='', encoding='utf-8')
+            self.file.seek(offset)
+            self.file.truncate()
+        else:
+            self.file = open(filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=BOOK_FIELDS, extrasaction='ignore', lineterminator='\n')
+        if not offset:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(row for row, _ in rows)
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class DatabaseSink:
+    """
+    Grava as linhas no banco com upsert, com um commit por lote: os livros já ficam
+    disponíveis na API durante a carga. No modo incremental grava só as linhas de
+    páginas alteradas e não remove livros.
+    """
+
+    def __init__(self, incremental=False, resumed=False):
+        from api import db
+
+        self.incremental = incremental
+        self.keys_table = None if incremental else KEYS_TABLE
+        self.conn = db.engine.connect()
+        self.conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+        self.synchronous = self.conn.exec_driver_sql('PRAGMA synchronous').scalar()
+        self.conn.exec_driver_sql('PRAGMA synchronous=NORMAL')
+        self.antes = self.conn.exec_driver_sql('SELECT COUNT(*) FROM book').scalar()
+        if self.keys_table:
+            create_keys_table(self.conn, self.keys_table, temporary=False)
+            if not resumed:
+                self.conn.exec_driver_sql(f'DELETE FROM {self.keys_table}')
+        self.conn.commit()
+        self.processados = self.alterados = 0
+
+    def write(self, rows):
+        from scripts.database_setup import bump_dataset_version
+
+        rows = [row for row, changed in rows if changed or not self.incremental]
+        if rows:
+            alterados = upsert_rows(self.conn, rows, self.keys_table)
+            if alterados:
+                # Invalida o cache da API: os livros do lote já são visíveis após o commit.
+                bump_dataset_version(self.conn)
+            self.alterados += alterados
+            self.processados += len(rows)
+        self.conn.commit()
+
+    def finish(self):
+        depois_upsert = self.conn.exec_driver_sql('SELECT COUNT(*) FROM book').scalar()
+        removidos = finish_load(self.conn, self.alterados, self.keys_table)
+        self.conn.commit()
+        self.conn.exec_driver_sql('PRAGMA optimize')
+        inseridos = depois_upsert - self.antes
+        return {
+            'processados': self.processados,
+            'inseridos': inseridos,
+            'atualizados': self.alterados - inseridos,
+            'removidos': removidos,
+        }
+
+    def close(self):
+        self.conn.rollback()
+        self.conn.exec_driver_sql(f'PRAGMA synchronous={int(self.synchronous)}')
+        self.conn.close()
+
+
+def _sink_worker(name, sink, inbox, acks):
+    """Consome os lotes de uma fila. Após um erro continua esvaziando a fila, para o produtor não travar."""
+    error = None
+    while True:
+        item = inbox.get()
+        if item is None:
+            return
+        seq, rows = item
+        result = None
+        if error is None:
+            try:
+                result = sink.write(rows)
+            except BaseException as exc:
+                error = exc
+        acks.put((name, seq, result, error))
+
+
+class _Fanout:
+    """
+    Envia cada lote às filas limitadas dos destinos (uma thread por destino) e grava o
+    checkpoint, em ordem, quando todos os destinos confirmam um lote.
+    """
+
+    def __init__(self, sinks, checkpoint):
+        self.checkpoint = checkpoint
+        self.acks = queue.Queue()
+        self.inboxes = {}
+        self.threads = []
+        for name, sink in sinks.items():
+            inbox = self.inboxes[name] = queue.Queue(maxsize=QUEUE_SIZE)
+            thread = threading.Thread(target=_sink_worker, args=(name, sink, inbox, self.acks),
+                                      name=f'pipeline-{name}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        self.pending = {}
+        self.next_seq = 0
+
+    def send(self, seq, rows, pages):
+        self.pending[seq] = {'pages': pages, 'results': {}}
+        for inbox in self.inboxes.values():
+            inbox.put((seq, rows))
+        self._collect(block=False)
+
+    def _collect(self, block):
+        while True:
+            try:
+                name, seq, result, error = self.acks.get(block=block)
+            except queue.Empty:
+                return
+            if error is not None:
+                raise error
+            self.pending[seq]['results'][name] = result
+            while self.next_seq in self.pending and len(self.pending[self.next_seq]['results']) == len(self.inboxes):
+                done = self.pending.pop(self.next_seq)
+                self.checkpoint.record(done['pages'], done['results']['csv'])
+                self.next_seq += 1
+            if block and not self.pending:
+                return
+
+    def close(self, wait=True):
+        """
+        Encerra as threads depois de gravarem os lotes já enviados. Com wait, espera as
+        confirmações e grava o checkpoint desses lotes.
+        """
+        try:
+            if wait and self.pending:
+                self._collect(block=True)
+        finally:
+            for inbox in self.inboxes.values():
+                inbox.put(None)
+            for thread in self.threads:
+                thread.join()
+
+
+def run_pipeline(pages, incremental=False, commit_every=BATCH_SIZE, csv_path=CSV_PATH, checkpoint=None):
+    """
+    Carga em streaming: as páginas do scraper (ver scripts.scraper.iter_scraped_pages) passam por
+    normalize -> batch e cada lote segue, por filas limitadas, para o CSV e para o banco
+    (um commit por lote de ~commit_every linhas). Deve rodar num app context.
+    O checkpoint registra as páginas concluídas; ao final da carga ele é apagado.
+    """
+    checkpoint = checkpoint or Checkpoint(CHECKPOINT_PATH, {})
+    inicio = time.perf_counter()
+    csv_sink = CsvSink(csv_path, checkpoint.csv_offset)
+    db_sink = DatabaseSink(incremental, checkpoint.resumed)
+    fanout = _Fanout({'csv': csv_sink, 'db': db_sink}, checkpoint)
+    try:
+        try:
+            for seq, (rows, done) in enumerate(batched(normalize(pages), commit_every)):
+                fanout.send(seq, rows, done)
+        except BaseException:
+            fanout.close(wait=False)
+            raise
+        fanout.close()
+        stats = db_sink.finish()
+    finally:
+        csv_sink.close()
+        db_sink.close()
+    checkpoint.clear()
+    segundos = time.perf_counter() - inicio
+    stats['segundos'] = round(segundos, 3)
+    stats['linhas_por_segundo'] = round(stats['processados'] / segundos) if segundos > 0 else stats['processados']
+    return stats
@@ -1,71 +1,478 @@
-import requests
-from bs4 import BeautifulSoup
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound
 import re
-import pandas as pd
 import time
-import os
+import random
+import threading
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urljoin
+from scripts.page_cache import PageCache, DEFAULT_CACHE_DIR
+
+BASE_URL = 'https://books.toscrape.com/'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Tree builders do BeautifulSoup aceitos; 'auto' usa o lxml (C) se estiver instalado.
+PARSERS = ('auto', 'lxml', 'html.parser')
 
-def scrape_all_books():
+# Partes de cada página usadas pelos parsers: o resto do HTML não vira árvore.
+LISTING_STRAINER = SoupStrainer(['article', 'li'], class_=['product_pod', 'next', 'current'])
+BREADCRUMB_STRAINER = SoupStrainer('ul', class_='breadcrumb')
+CATEGORIES_STRAINER = SoupStrainer('div', class_='side_categories')
+
+
+def resolve_parser(name='auto'):
+    """Nome do tree builder a usar: 'auto' escolhe o lxml quando disponível."""
+    if name not in PARSERS:
+        raise ValueError(f"Parser desconhecido: {name}. Use um de {list(PARSERS)}.")
+    candidates = ('lxml', 'html.parser') if name == 'auto' else (name,)
+    for candidate in candidates:
+        try:
+            BeautifulSoup('', candidate)
+        except FeatureNotFound:
+            continue
+        return candidate
+    raise RuntimeError(f"Parser '{name}' indisponível: instale o pacote lxml.")
+
+
+class PageParser:
     """
-    Função para fazer scraping de todos os livros e retornar uma lista de dicionários.
+    Backend de parsing do scraper: o tree builder do BeautifulSoup (ver PARSERS) e,
+    opcionalmente, um pool de `processes` processos para tirar o parsing (CPU) das
+    threads que fazem as requisições.
+    """
+
+    def __init__(self, parser='auto', processes=0):
+        self.features = resolve_parser(parser)
+        # 'spawn': os workers são criados a partir das threads do scraper, e fork com
+        # threads em andamento pode herdar locks travados.
+        self.pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context('spawn')
+        ) if processes else None
+
+    def parse(self, fn, html, *args):
+        if self.pool is not None:
+            return self.pool.submit(fn, html, *args, features=self.features).result()
+        return fn(html, *args, features=self.features)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) compartilhado entre as threads.
+    Permite no máximo `rate` requisições por segundo, com rajadas de até `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Fetcher:
+    """
+    Cliente HTTP do scraper: sessão compartilhada, limite de taxa,
+    retry com backoff exponencial e contagem de requisições feitas.
+    Com um PageCache, as requisições são condicionais e páginas inalteradas
+    reaproveitam o resultado já parseado.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, timeout=15, cache=None, parser=None):
+        # requests (e pandas, em save_to_csv) são importados só onde são usados: os processos
+        # de parsing do PageParser importam este módulo e só precisam do BeautifulSoup.
+        import requests
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.bucket = TokenBucket(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.parser = parser or PageParser()
+        self.requests_made = 0
+        self.pages_unchanged = 0
+        self.lock = threading.Lock()
+
+    def _request(self, url, headers=None):
+        import requests
+
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            with self.lock:
+                self.requests_made += 1
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+            time.sleep(self.backoff * 2 ** attempt + random.uniform(0, self.backoff))
+
+    def get(self, url):
+        """Retorna o HTML da URL, repetindo a requisição em falhas transitórias."""
+        return self._request(url).text
+
+    def get_bytes(self, url):
+        """Retorna (conteúdo, Content-Type) da URL, para arquivos binários como as capas."""
+        response = self._request(url)
+        return response.content, response.headers.get('Content-Type', '')
+
+    def get_parsed(self, url, parse, *args):
+        """
+        Retorna (parse(html, *args), mudou), com o parse feito pelo PageParser do fetcher.
+        Sem cache, sempre busca e parseia a página. Com cache, envia uma requisição
+        condicional e só parseia se o conteúdo mudou.
+        """
+        if self.cache is None:
+            return self.parser.parse(parse, self.get(url), *args), True
+
+        entry = self.cache.get(url)
+        response = self._request(url, headers=self.cache.conditional_headers(url))
+        if response.status_code == 304 and entry:
+            with self.lock:
+                self.pages_unchanged += 1
+            return entry['parsed'], False
+
+        sha256 = hashlib.sha256(response.content).hexdigest()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if entry and entry['sha256'] == sha256:
+            self.cache.put(url, etag, last_modified, sha256, entry['parsed'])
+            with self.lock:
+                self.pages_unchanged += 1
+            return entry['parsed'], False
+
+        parsed = self.parser.parse(parse, response.text, *args)
+        self.cache.put(url, etag, last_modified, sha256, parsed)
+        return parsed, True
+
+
+def _pod_tags(livro):
+    """
+    Tags usadas de um article.product_pod, encontradas em uma única passada pelos
+    descendentes (em vez de um find() por campo): o link do título (h3 > a), a imagem
+    e os parágrafos de preço, rating e disponibilidade.
+    """
+    tags = {}
+    for tag in livro.descendants:
+        name = tag.name
+        if name == 'p':
+            classes = tag.get('class') or ()
+            for classe in ('price_color', 'star-rating', 'availability'):
+                if classe in classes:
+                    tags.setdefault(classe, tag)
+        elif name == 'img':
+            tags.setdefault('img', tag)
+        elif name == 'a' and tag.parent.name == 'h3':
+            tags.setdefault('link', tag)
+    return tags
+
+
+def parse_listing_page(html, page_url, features='html.parser'):
+    """
+    Extrai os livros de uma página de listagem (catálogo ou categoria).
+    Retorna a lista de livros (com a URL da página de detalhe), a URL da
+    próxima página (ou None) e o total de páginas informado no paginador.
+    """
+    soup = BeautifulSoup(html, features, parse_only=LISTING_STRAINER)
+    books = []
+    for livro in soup.find_all('article', class_='product_pod'):
+        tags = _pod_tags(livro)
+        books.append({
+            'titulo': tags['link']['title'],
+            'preco': float(re.search(r'[\d\.]+', tags['price_color'].text).group()),
+            'rating': tags['star-rating']['class'][1],
+            'disponibilidade': tags['availability'].text.strip(),
+            'imagem_url': urljoin(page_url, tags['img']['src']),
+            'url': urljoin(page_url, tags['link']['href']),
+        })
+
+    next_button = soup.find('li', class_='next')
+    next_url = urljoin(page_url, next_button.a['href']) if next_button else None
+
+    total_pages = None
+    current = soup.find('li', class_='current')
+    if current:
+        match = re.search(r'of\s+(\d+)', current.text)
+        total_pages = int(match.group(1)) if match else None
+    return books, next_url, total_pages
+
+
+def parse_book_category(html, features='html.parser'):
+    """Extrai a categoria do livro a partir do breadcrumb da página de detalhe."""
+    soup = BeautifulSoup(html, features, parse_only=BREADCRUMB_STRAINER)
+    return soup.find('ul', class_='breadcrumb').find_all('a')[-1].text
+
+
+def parse_category_index(html, page_url, features='html.parser'):
+    """Extrai da barra lateral da página inicial a lista de (categoria, URL da listagem)."""
+    soup = BeautifulSoup(html, features, parse_only=CATEGORIES_STRAINER)
+    links = soup.find('div', class_='side_categories').find('ul').find('ul').find_all('a')
+    return [(link.text.strip(), urljoin(page_url, link['href'])) for link in links]
+
+
+def _bounded_map(executor, fn, items, window):
+    """
+    Como executor.map, mas preguiçoso: no máximo `window` tarefas em andamento, com os
+    resultados na ordem dos itens. Mantém a memória limitada em listagens grandes.
+    """
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _iter_listing_pages(fetcher, executor, first_urls, window, known_pages=None, done_pages=frozenset()):
+    """
+    Percorre, em ordem, as páginas de cada listagem e produz uma tupla por página:
+    (URL inicial da listagem, URLs de todas as páginas da listagem ou None se o paginador
+    não informa o total, URL da página, [(livro, mudou), ...]).
+
+    As primeiras páginas e as páginas seguintes são buscadas em paralelo, com no máximo
+    `window` páginas em andamento. 'mudou' indica se a página mudou desde o último
+    scraping. As páginas em `done_pages` são puladas; as listagens com as páginas já
+    conhecidas em `known_pages` (retomada de uma carga interrompida) não precisam da
+    primeira página para descobrir o paginador.
     """
-    print("Iniciando scraping de todos os livros...")
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    known_pages = known_pages or {}
+
+    def fetch_page(url):
+        return fetcher.get_parsed(url, parse_listing_page, url)
+
+    def first_page(first_url):
+        page_urls = known_pages.get(first_url)
+        if page_urls is not None:
+            return first_url, page_urls, None
+        parsed = fetch_page(first_url)
+        (_, next_url, total_pages), _ = parsed
+        if next_url and total_pages:
+            page_urls = [first_url] + [urljoin(first_url, f'page-{n}.html') for n in range(2, total_pages + 1)]
+        elif next_url:
+            page_urls = None
+        else:
+            page_urls = [first_url]
+        return first_url, page_urls, parsed
+
+    for first_url, page_urls, parsed in _bounded_map(executor, first_page, first_urls, window):
+        if page_urls is None:
+            # Paginador sem total: segue o link 'next' sequencialmente.
+            url = first_url
+            while url:
+                (books, next_url, _), changed = parsed
+                print(f"Acessando página: {url} | Encontrados {len(books)} livros.")
+                if url not in done_pages:
+                    yield first_url, None, url, [(book, changed) for book in books]
+                url = next_url
+                parsed = fetch_page(url) if url else None
+            continue
+
+        pending = [url for url in page_urls if url not in done_pages]
+
+        def get_page(url, first_url=first_url, parsed=parsed):
+            return parsed if url == first_url and parsed is not None else fetch_page(url)
+
+        for url, ((books, _, _), changed) in zip(pending, _bounded_map(executor, get_page, pending, window)):
+            print(f"Acessando página: {url} | Encontrados {len(books)} livros.")
+            yield first_url, page_urls, url, [(book, changed) for book in books]
+
+
+def _to_record(book, categoria):
+    return {
+        'titulo': book['titulo'],
+        'preco': book['preco'],
+        'rating': book['rating'],
+        'disponibilidade': book['disponibilidade'],
+        'categoria': categoria,
+        'imagem_url': book['imagem_url']
     }
-    
-    url_base = 'https://books.toscrape.com/catalogue/'
-    next_page_url = 'page-1.html'
-    all_books_data = []
-    session = requests.Session()
-    session.headers.update(headers)
-
-    while next_page_url:
-        current_page_url = url_base + next_page_url
-        response = session.get(current_page_url, timeout=15)
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        livros_na_pagina = soup.find_all('article', class_='product_pod')
-
-        print(f"Acessando página: {current_page_url} | Encontrados {len(livros_na_pagina)} livros.")
-
-        for livro in livros_na_pagina:
-            titulo = livro.h3.a['title']
-            preco_str = livro.find('p', class_='price_color').text
-            preco = float(re.search(r'[\d\.]+', preco_str).group())
-            rating = livro.find('p', class_='star-rating')['class'][1]
-            disponibilidade = livro.find('p', class_='instock availability').text.strip()
-            url_imagem_relativa = livro.find('img')['src']
-            url_imagem_completa = 'https://books.toscrape.com/' + url_imagem_relativa.replace('../', '')
-            url_livro_relativa = livro.h3.a['href']
-            url_livro_completa = url_base + url_livro_relativa
-            pagina_livro_response = session.get(url_livro_completa, timeout=15)
-            soup_livro = BeautifulSoup(pagina_livro_response.text, 'html.parser')
-            categoria = soup_livro.find('ul', class_='breadcrumb').find_all('a')[-1].text
-            all_books_data.append({
-                'titulo': titulo,
-                'preco': preco,
-                'rating': rating,
-                'disponibilidade': disponibilidade,
-                'categoria': categoria,
-                'imagem_url': url_imagem_completa
-            })
-
-            time.sleep(0.5)
-
-        next_button = soup.find('li', class_='next')
-        next_page_url = next_button.a['href'] if next_button else None
-            
-    print(f"\nScraping finalizado! {len(all_books_data)} livros encontrados.")
-    return all_books_data
+
+
+def _iter_by_detail(fetcher, executor, base_url, window, known_pages, done_pages):
+    """Estratégia 'detail': catálogo completo + uma página de detalhe por livro para ler a categoria."""
+    pages = _iter_listing_pages(fetcher, executor, [urljoin(base_url, 'catalogue/page-1.html')],
+                                window, known_pages, done_pages)
+    for listing, page_urls, url, books in pages:
+        categorias = executor.map(lambda item: fetcher.get_parsed(item[0]['url'], parse_book_category), books)
+        yield listing, page_urls, url, [
+            (_to_record(book, categoria), listing_changed or detail_changed)
+            for (book, listing_changed), (categoria, detail_changed) in zip(books, categorias)
+        ]
+
+
+def _iter_by_category(fetcher, executor, base_url, window, known_pages, done_pages):
+    """Estratégia 'categories': lê a barra lateral uma vez e percorre a listagem de cada categoria."""
+    index_url = urljoin(base_url, 'index.html')
+    categorias, _ = fetcher.get_parsed(index_url, parse_category_index, index_url)
+    categoria_por_url = {url: categoria for categoria, url in categorias}
+    pages = _iter_listing_pages(fetcher, executor, [url for _, url in categorias],
+                                window, known_pages, done_pages)
+    for listing, page_urls, url, books in pages:
+        yield listing, page_urls, url, [(_to_record(book, categoria_por_url[listing]), changed)
+                                        for book, changed in books]
+
+
+STRATEGIES = {
+    'categories': _iter_by_category,
+    'detail': _iter_by_detail,
+}
+
+
+def iter_scraped_pages(base_url=BASE_URL, strategy='categories', workers=DEFAULT_WORKERS, fetcher=None,
+                       known_pages=None, done_pages=frozenset()):
+    """
+    Scraping em streaming: produz, em ordem determinística, uma tupla por página de
+    listagem (URL da listagem, URLs das páginas da listagem, URL da página,
+    [(livro, mudou), ...]), sem acumular o catálogo em memória. known_pages e
+    done_pages permitem retomar uma carga interrompida (ver scripts/pipeline.py).
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estratégia desconhecida: {strategy}. Use uma de {sorted(STRATEGIES)}.")
+    fetcher = fetcher or Fetcher(workers=workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from STRATEGIES[strategy](fetcher, executor, base_url, 2 * workers, known_pages, done_pages)
+
+
+def _scrape(base_url, strategy, workers, rate, retries, fetcher, parser='auto', parse_processes=0):
+    print(f"Iniciando scraping de todos os livros (estratégia '{strategy}')...")
+    own_parser = None
+    if fetcher is None:
+        own_parser = PageParser(parser, parse_processes)
+        fetcher = Fetcher(workers=workers, rate=rate, retries=retries, parser=own_parser)
+    inicio = time.perf_counter()
+
+    try:
+        results = [
+            item
+            for _, _, _, books in iter_scraped_pages(base_url, strategy, workers, fetcher)
+            for item in books
+        ]
+    finally:
+        if own_parser is not None:
+            own_parser.close()
+
+    duracao = time.perf_counter() - inicio
+    print(f"\nScraping finalizado! {len(results)} livros encontrados "
+          f"({fetcher.requests_made} requisições, {fetcher.pages_unchanged} páginas inalteradas, "
+          f"{duracao:.1f}s).")
+    return results
+
+
+def scrape_all_books(base_url=BASE_URL, strategy='categories', workers=DEFAULT_WORKERS,
+                     rate=DEFAULT_RATE, retries=DEFAULT_RETRIES, fetcher=None, parser='auto', parse_processes=0):
+    """
+    Função para fazer scraping de todos os livros e retornar uma lista de dicionários.
+
+    Estratégias disponíveis:
+    - 'categories' (padrão): percorre as listagens de cada categoria, ~20x menos requisições.
+      Os livros saem agrupados por categoria, na ordem da barra lateral do site.
+    - 'detail': percorre o catálogo e abre a página de detalhe de cada livro para ler a
+      categoria no breadcrumb. Mantém a ordem do catálogo.
+
+    As páginas são buscadas por um pool de `workers` threads, limitadas a `rate`
+    requisições por segundo (0 desativa o limite). A ordem do resultado é sempre
+    determinística, independente do número de workers.
+
+    O HTML é parseado com o tree builder `parser` (ver PARSERS), apenas nos trechos
+    usados de cada página; com parse_processes > 0 o parsing roda em um pool de processos.
+    """
+    results = _scrape(base_url, strategy, workers, rate, retries, fetcher, parser, parse_processes)
+    return [record for record, _ in results]
+
+
+def scrape_changed_books(base_url=BASE_URL, strategy='categories', workers=DEFAULT_WORKERS,
+                         rate=DEFAULT_RATE, retries=DEFAULT_RETRIES, cache_dir=DEFAULT_CACHE_DIR,
+                         parser='auto', parse_processes=0):
+    """
+    Scraping incremental: usa o cache de páginas em cache_dir para fazer GETs condicionais
+    e só parsear as páginas que mudaram desde a última execução.
+    Retorna (todos_os_livros, livros_alterados); na primeira execução todos são alterados.
+    """
+    cache = PageCache(cache_dir)
+    page_parser = PageParser(parser, parse_processes)
+    fetcher = Fetcher(workers=workers, rate=rate, retries=retries, cache=cache, parser=page_parser)
+    try:
+        results = _scrape(base_url, strategy, workers, rate, retries, fetcher)
+    finally:
+        page_parser.close()
+    cache.save()
+    all_books_data = [record for record, _ in results]
+    changed_books = [record for record, changed in results if changed]
+    print(f"{len(changed_books)} livros em páginas alteradas.")
+    return all_books_data, changed_books
 
 def save_to_csv(books_data, filename="data/books_data.csv"):
     """Salva os dados dos livros em um arquivo CSV."""
+    import pandas as pd
+
     df = pd.DataFrame(books_data)
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     df.to_csv(filename, index=False)
     print(f"Dados salvos em {filename}")
 
 if __name__ == '__main__':
-    scraped_data = scrape_all_books()
-    save_to_csv(scraped_data)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Scraper do books.toscrape.com.')
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='categories')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='Requisições por segundo (0 = sem limite).')
+    parser.add_argument('--incremental', action='store_true', help='Usa o cache de páginas e requisições condicionais.')
+    parser.add_argument('--parser', choices=PARSERS, default='auto', help='Tree builder do BeautifulSoup.')
+    parser.add_argument('--parse-processes', type=int, default=0, help='Processos para o parsing (0 = nas threads).')
+    args = parser.parse_args()
+
+    options = {'strategy': args.strategy, 'workers': args.workers, 'rate': args.rate,
+               'parser': args.parser, 'parse_processes': args.parse_processes}
+    if args.incremental:
+        scraped_data, _ = scrape_changed_books(args.base_url, **options)
+    else:
+        scraped_data = scrape_all_books(args.base_url, **options)
+    save_to_csv(scraped_data)
@@ -0,0 +1,95 @@
+import sys
+import os
+import random
+import hashlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+RATINGS = ['One', 'Two', 'Three', 'Four', 'Five']
+WORDS = (
+    'light attic velvet soumission sharp objects sapiens history requiem red dirty little secrets '
+    'coming woman spirit shadow fire night garden river stone winter summer ocean story secret '
+    'queen king city house dark last first lost wild heart mind world life death love war peace '
+    'journey home blood silver golden broken hidden silent forgotten midnight morning empire'
+).split()
+CATEGORIES = [
+    'Travel', 'Mystery', 'Historical Fiction', 'Sequential Art', 'Classics', 'Philosophy',
+    'Romance', 'Womens Fiction', 'Fiction', 'Childrens', 'Religion', 'Nonfiction', 'Music',
+    'Default', 'Science Fiction', 'Sports and Games', 'Add a comment', 'Fantasy', 'New Adult',
+    'Young Adult', 'Science', 'Poetry', 'Paranormal', 'Art', 'Psychology', 'Autobiography',
+    'Parenting', 'Adult Fiction', 'Humor', 'Horror', 'History', 'Food and Drink',
+    'Christian Fiction', 'Business', 'Biography', 'Thriller', 'Contemporary', 'Spirituality',
+    'Academic', 'Self Help', 'Historical', 'Christian', 'Suspense', 'Short Stories', 'Novels',
+    'Health', 'Politics', 'Cultural', 'Erotica', 'Crime',
+]
+
+# Tamanhos de catálogo usados nos benchmarks.
+CATALOG_SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def parse_size(value):
+    """Converte '1000', '100k' ou '1m' em número de livros (argparse type)."""
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        raise ValueError(f'Tamanho de catálogo inválido: {value!r} (ex.: 1000, 100k, 1m).')
+
+
+def size_label(n):
+    """Rótulo curto de um tamanho de catálogo (1000 -> '1k')."""
+    for label, size in CATALOG_SIZES.items():
+        if size == n:
+            return label
+    return str(n)
+
+
+def generate_books(n, seed=42):
+    """
+    Gera n livros sintéticos (mesmo formato do scraper), de forma determinística para
+    uma mesma semente. Os títulos combinam palavras de um vocabulário fixo, para que as
+    buscas por título tenham resultados realistas.
+    """
+    rng = random.Random(seed)
+    for i in range(n):
+        titulo = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+        digest = hashlib.md5(f'{seed}-{i}'.encode()).hexdigest()
+        yield {
+            'titulo': f'{titulo} #{i}',
+            'preco': round(rng.uniform(10, 60), 2),
+            'rating': rng.choice(RATINGS),
+            'disponibilidade': 'In stock',
+            'categoria': rng.choice(CATEGORIES),
+            'imagem_url': f'https://books.toscrape.com/media/cache/{digest[:2]}/{digest[2:4]}/{digest}.jpg',
+        }
+
+
+def build_catalog(db_path, n, seed=42):
+    """Cria (ou recarrega) em db_path um banco SQLite com o schema real e n livros sintéticos."""
+    from api import create_app, db
+    from scripts.database_setup import migrate_database, bulk_load, export_snapshot
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(db_path)})
+    with app.app_context():
+        db.create_all()
+        migrate_database()
+        stats = bulk_load(generate_books(n, seed))
+        export_snapshot()
+        db.engine.dispose()
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gera um catálogo sintético de livros em SQLite.')
+    parser.add_argument('--books', type=parse_size, default=100_000, help='Ex.: 1000, 100k, 1m.')
+    parser.add_argument('--output', default='data/synthetic_books.db')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    stats = build_catalog(args.output, args.books, args.seed)
+    print(f"{args.output}: {stats['inseridos']} livros inseridos em {stats['segundos']}s "
+          f"({stats['linhas_por_segundo']} linhas/s).")
@@ -0,0 +1,5 @@
+# Ponto de entrada WSGI de produção (gunicorn.conf.py ou outro servidor WSGI): importa só o
+# pacote api, sem o servidor de desenvolvimento. Para desenvolvimento use run.py.
+from api import create_app
+
+app = create_app()